@@ -0,0 +1,117 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_DEPTH, ADMISSION_SHED, ADMISSION_WAIT
+
+# Lower rank is served first
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Request shed ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Caps concurrent analyses and holds excess requests in a bounded,
+    priority-ordered wait queue. Requests that find their class's queue full,
+    or wait longer than `queue_timeout`, are shed immediately instead of
+    piling up behind work that will not finish in time.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: dict, queue_timeout: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.waiting = {priority: 0 for priority in PRIORITIES}
+        self.shed = {priority: 0 for priority in PRIORITIES}
+        self._waiters = []
+        self._sequence = itertools.count()
+        # Moving average of slot hold time, used to estimate Retry-After
+        self._service_time = 1.0
+
+    def _retry_after(self) -> int:
+        queued = sum(self.waiting.values())
+        return max(1, math.ceil((queued + 1) * self._service_time / self.max_concurrency))
+
+    def _reject(self, priority: str, reason: str):
+        self.shed[priority] += 1
+        ADMISSION_SHED.inc(priority=priority, reason=reason)
+        raise AdmissionRejected(reason, self._retry_after())
+
+    def _set_waiting(self, priority: str, delta: int):
+        self.waiting[priority] += delta
+        ADMISSION_QUEUE_DEPTH.labels(priority=priority).set(self.waiting[priority])
+
+    async def acquire(self, priority: str, timeout: float = None):
+        # Slots are handed directly to live waiters on release, so a free slot
+        # implies nobody is waiting (only timed-out entries may remain queued)
+        if self.in_flight < self.max_concurrency:
+            self.in_flight += 1
+            ADMISSION_IN_FLIGHT.labels().set(self.in_flight)
+            return
+
+        if self.waiting[priority] >= self.max_queue.get(priority, 0):
+            self._reject(priority, "queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (PRIORITIES[priority], next(self._sequence), waiter))
+        self._set_waiting(priority, 1)
+        try:
+            wait = self.queue_timeout if timeout is None else min(self.queue_timeout, timeout)
+            await asyncio.wait_for(waiter, timeout=wait)
+        except asyncio.TimeoutError:
+            # release() can hand over the slot just as the timeout fires; the slot
+            # is already counted in in_flight, so take it rather than leak it
+            if waiter.done() and not waiter.cancelled():
+                return
+            self._reject(priority, "queue_timeout")
+        except BaseException:
+            # Cancelled after the slot was handed over: give it back
+            if waiter.done() and not waiter.cancelled():
+                self.release(0.0)
+            raise
+        finally:
+            self._set_waiting(priority, -1)
+
+    def release(self, held_for: float):
+        if held_for:
+            self._service_time = 0.9 * self._service_time + 0.1 * held_for
+
+        # Hand the slot straight to the best waiter so in_flight never dips
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+        self.in_flight -= 1
+        ADMISSION_IN_FLIGHT.labels().set(self.in_flight)
+
+    @asynccontextmanager
+    async def slot(self, priority: str = "interactive", timeout: float = None):
+        if priority not in PRIORITIES:
+            priority = "interactive"
+        queued_at = time.perf_counter()
+        await self.acquire(priority, timeout)
+        started_at = time.perf_counter()
+        ADMISSION_WAIT.labels(priority=priority).observe(started_at - queued_at)
+        try:
+            yield
+        finally:
+            self.release(time.perf_counter() - started_at)
+
+    def status(self) -> dict:
+        return {
+            'in_flight': self.in_flight,
+            'max_concurrency': self.max_concurrency,
+            'waiting': dict(self.waiting),
+            'shed': dict(self.shed)
+        }
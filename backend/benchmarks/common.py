@@ -0,0 +1,57 @@
+import json
+import os
+import platform
+import statistics
+from datetime import datetime
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), "corpus.jsonl")
+
+
+def load_corpus(path: str = DEFAULT_CORPUS) -> list:
+    """Read a replayable JSONL corpus of {"text": ...} records"""
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def percentiles(samples: list) -> dict:
+    """Exact latency summary in milliseconds for a list of durations in seconds"""
+    if not samples:
+        return {'count': 0}
+    ordered = sorted(samples)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+    return {
+        'count': len(ordered),
+        'mean': round(statistics.fmean(ordered) * 1000, 3),
+        'p50': round(pick(0.50), 3),
+        'p95': round(pick(0.95), 3),
+        'p99': round(pick(0.99), 3),
+        'max': round(ordered[-1] * 1000, 3)
+    }
+
+
+def histogram_percentiles(summary: dict) -> dict:
+    """Convert a `metrics.Histogram.summary()` from seconds to milliseconds"""
+    return {
+        name: {k: (v if k == 'count' else round(v * 1000, 3)) for k, v in values.items()}
+        for name, values in summary.items()
+    }
+
+
+def save_results(kind: str, data: dict, output_dir: str = RESULTS_DIR) -> str:
+    """Write a benchmark result file and return its path"""
+    os.makedirs(output_dir, exist_ok=True)
+    data = {
+        'benchmark': kind,
+        'created_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        **data
+    }
+    path = os.path.join(output_dir, f"{kind}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+    return path
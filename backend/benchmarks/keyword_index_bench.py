@@ -0,0 +1,107 @@
+"""
+Recall-vs-latency benchmark for the medical keyword index backends. Uses
+synthetic clustered embeddings so it runs without the sentence encoder. Run
+from the backend directory:
+
+    python -m benchmarks.keyword_index_bench --sizes 100 1000 10000 100000
+"""
+import argparse
+import time
+import numpy as np
+from models.keyword_index import ExactIndex, IVFIndex
+from benchmarks.common import RESULTS_DIR, percentiles, save_results
+
+
+def synthetic_vocabulary(size: int, dims: int, rng: np.random.Generator) -> np.ndarray:
+    """Unit vectors grouped around topic centres, like terms from related clinical areas"""
+    centres = rng.standard_normal((max(10, size // 50), dims)).astype(np.float32)
+    vectors = centres[rng.integers(len(centres), size=size)]
+    vectors += 0.6 * rng.standard_normal((size, dims)).astype(np.float32)
+    return vectors
+
+
+def synthetic_queries(vocabulary: np.ndarray, count: int, rng: np.random.Generator) -> np.ndarray:
+    """Mostly near-vocabulary tokens plus some unrelated words"""
+    near = vocabulary[rng.integers(len(vocabulary), size=count)]
+    queries = near + 0.3 * rng.standard_normal(near.shape).astype(np.float32)
+    unrelated = rng.random(count) < 0.3
+    queries[unrelated] = rng.standard_normal((int(unrelated.sum()), vocabulary.shape[1]))
+    return queries
+
+
+def time_search(index, batches: list) -> tuple[dict, np.ndarray, np.ndarray]:
+    samples, scores, ids = [], [], []
+    for batch in batches:
+        start = time.perf_counter()
+        batch_scores, batch_ids = index.search(batch, k=1)
+        samples.append(time.perf_counter() - start)
+        scores.append(batch_scores[:, 0])
+        ids.append(batch_ids[:, 0])
+    return percentiles(samples), np.concatenate(scores), np.concatenate(ids)
+
+
+def run_size(size: int, args, rng: np.random.Generator) -> dict:
+    vocabulary = synthetic_vocabulary(size, args.dims, rng)
+    terms = [f"term_{i}" for i in range(size)]
+    queries = synthetic_queries(vocabulary, args.batches * args.batch_size, rng)
+    batches = np.split(queries, args.batches)
+
+    start = time.perf_counter()
+    exact = ExactIndex(terms, vocabulary)
+    exact_build = time.perf_counter() - start
+    exact_latency, exact_scores, exact_ids = time_search(exact, batches)
+    # Tokens the classifier would actually flag as medical at the default threshold
+    matchable = exact_scores >= args.threshold
+
+    result = {
+        'exact': {'build_s': round(exact_build, 3), 'batch_latency_ms': exact_latency},
+        'ivf': []
+    }
+
+    start = time.perf_counter()
+    ivf = IVFIndex(terms, vocabulary)
+    ivf_build = time.perf_counter() - start
+    for n_probe in args.probes:
+        ivf.n_probe = n_probe
+        latency, _, ids = time_search(ivf, batches)
+        result['ivf'].append({
+            'n_lists': len(ivf.centroids),
+            'n_probe': n_probe,
+            'build_s': round(ivf_build, 3),
+            'recall_at_1': round(float(np.mean(ids == exact_ids)), 4),
+            'recall_at_threshold': round(float(np.mean(ids[matchable] == exact_ids[matchable])), 4)
+            if matchable.any() else None,
+            'batch_latency_ms': latency
+        })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keyword index recall vs latency benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--dims", type=int, default=384, help="all-MiniLM-L6-v2 embedding size")
+    parser.add_argument("--batch-size", type=int, default=64, help="Tokens per post")
+    parser.add_argument("--batches", type=int, default=50)
+    parser.add_argument("--threshold", type=float, default=0.6, help="Classifier similarity threshold")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output-dir", default=RESULTS_DIR)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    results = {}
+    for size in args.sizes:
+        results[size] = run_size(size, args, rng)
+        exact = results[size]['exact']['batch_latency_ms']
+        print(f"vocabulary={size}: exact p50={exact['p50']}ms")
+        for ivf in results[size]['ivf']:
+            print(f"  ivf lists={ivf['n_lists']} probe={ivf['n_probe']}: "
+                  f"recall@1={ivf['recall_at_1']} recall@threshold={ivf['recall_at_threshold']} "
+                  f"p50={ivf['batch_latency_ms']['p50']}ms")
+
+    path = save_results("keyword_index", {'config': vars(args), 'results': results}, args.output_dir)
+    print(f"Results saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+End-to-end load benchmark.
+
+Starts the mock upstreams, points the API at them, serves the FastAPI app
+with uvicorn on a background thread and replays a corpus against /analyze
+from a fixed number of concurrent clients. Run from the backend directory:
+
+    python -m benchmarks.load_test --requests 500 --concurrency 16
+"""
+import argparse
+import asyncio
+import importlib
+import os
+import random
+import tempfile
+import threading
+import time
+import aiohttp
+import uvicorn
+from benchmarks.mock_upstreams import MockUpstreams, UpstreamProfile
+from benchmarks.common import (DEFAULT_CORPUS, RESULTS_DIR, load_corpus, percentiles,
+                               histogram_percentiles, save_results)
+
+
+def replay_order(corpus: list, total: int, seed: int) -> list:
+    """Deterministic request sequence so runs are comparable"""
+    rng = random.Random(seed)
+    order = []
+    while len(order) < total:
+        batch = list(corpus)
+        rng.shuffle(batch)
+        order.extend(batch)
+    return order[:total]
+
+
+def start_api(port: int, env: dict):
+    """Import the app with the benchmark environment and serve it on its own thread"""
+    os.environ.update(env)
+    routers = importlib.import_module("routers")
+
+    server = uvicorn.Server(uvicorn.Config(routers.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+async def drive(base_url: str, requests: list, concurrency: int, defer_evidence: bool) -> dict:
+    latencies = []
+    statuses = {}
+    pending = iter(requests)
+
+    async def client(session: aiohttp.ClientSession):
+        for record in pending:
+            payload = {'text': record['text'], 'defer_evidence': defer_evidence}
+            start = time.perf_counter()
+            try:
+                async with session.post(f"{base_url}/analyze", json=payload) as response:
+                    await response.read()
+                    status = response.status
+            except aiohttp.ClientError:
+                status = 'connection_error'
+            except asyncio.TimeoutError:
+                # ClientTimeout raises this, not a ClientError
+                status = 'timeout'
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=60)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*(client(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        'duration_s': round(elapsed, 3),
+        'throughput_rps': round(len(latencies) / elapsed, 2),
+        'status_counts': {str(k): v for k, v in statuses.items()},
+        'latency_ms': percentiles(latencies)
+    }
+
+
+async def run(args) -> dict:
+    mocks = MockUpstreams(
+        port=args.mock_port, seed=args.seed,
+        wikipedia=UpstreamProfile(args.wiki_latency_ms, args.jitter_ms, args.wiki_error_rate),
+        pubmed=UpstreamProfile(args.pubmed_latency_ms, args.jitter_ms, args.pubmed_error_rate)
+    )
+    await mocks.start()
+
+    workdir = tempfile.mkdtemp(prefix="misinfo_bench_")
+    server, thread = start_api(args.api_port, {
+        'WIKIPEDIA_SUMMARY_URL': mocks.wikipedia_summary_url,
+        'PUBMED_EUTILS_URL': mocks.pubmed_eutils_url,
+        'DB_PATH': os.path.join(workdir, "bench.db"),
+        'JOB_QUEUE_DB_PATH': os.path.join(workdir, "bench_jobs.db"),
+        'LOG_LEVEL': "WARNING"
+    })
+
+    try:
+        requests = replay_order(load_corpus(args.corpus), args.requests, args.seed)
+        client_report = await drive(f"http://127.0.0.1:{args.api_port}", requests,
+                                    args.concurrency, args.defer_evidence)
+    finally:
+        server.should_exit = True
+        await asyncio.to_thread(thread.join)
+        await mocks.stop()
+
+    # The app runs in this process, so its histograms are readable directly
+    metrics = importlib.import_module("metrics")
+    return {
+        'config': vars(args),
+        'client': client_report,
+        'server_request_ms': histogram_percentiles(metrics.REQUEST_LATENCY.summary()),
+        'stage_ms': histogram_percentiles(metrics.STAGE_LATENCY.summary()),
+        'upstream_ms': histogram_percentiles(metrics.UPSTREAM_LATENCY.summary()),
+        'db_ms': histogram_percentiles(metrics.DB_LATENCY.summary()),
+        'upstream_requests': mocks.request_counts
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="End-to-end /analyze load benchmark against mock upstreams")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--defer-evidence", action="store_true")
+    parser.add_argument("--api-port", type=int, default=8800)
+    parser.add_argument("--mock-port", type=int, default=8900)
+    parser.add_argument("--wiki-latency-ms", type=float, default=50.0)
+    parser.add_argument("--pubmed-latency-ms", type=float, default=150.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--wiki-error-rate", type=float, default=0.0)
+    parser.add_argument("--pubmed-error-rate", type=float, default=0.0)
+    parser.add_argument("--output-dir", default=None)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    report = asyncio.run(run(args))
+    path = save_results("load", report, args.output_dir or RESULTS_DIR)
+
+    client = report['client']
+    print(f"Throughput: {client['throughput_rps']} req/s over {client['duration_s']}s")
+    print(f"Latency (ms): {client['latency_ms']}")
+    for stage, values in report['stage_ms'].items():
+        print(f"  {stage}: {values}")
+    print(f"Results saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Micro-benchmarks for the per-request building blocks. Run from the backend
+directory:
+
+    python -m benchmarks.micro --iterations 200
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+from benchmarks.common import DEFAULT_CORPUS, RESULTS_DIR, load_corpus, percentiles, save_results
+
+
+def bench(fn, inputs: list, iterations: int, warmup: int = 5) -> dict:
+    """Time `fn(item)` for `iterations` calls cycling over `inputs`"""
+    for i in range(warmup):
+        fn(inputs[i % len(inputs)])
+
+    samples = []
+    for i in range(iterations):
+        item = inputs[i % len(inputs)]
+        start = time.perf_counter()
+        fn(item)
+        samples.append(time.perf_counter() - start)
+
+    result = percentiles(samples)
+    result['ops_per_second'] = round(len(samples) / sum(samples), 2)
+    return result
+
+
+def bench_store_result(texts: list, iterations: int) -> dict:
+    from database.db import Database
+
+    db = Database(os.path.join(tempfile.mkdtemp(prefix="misinfo_bench_"), "micro.db"))
+    return bench(lambda text: db.store_result({
+        'text': text,
+        'is_medical': True,
+        'medical_confidence': 0.8,
+        'is_fake': False,
+        'fake_confidence': 0.6,
+        'timestamp': datetime.now().isoformat()
+    }), texts, iterations)
+
+
+def bench_fake_detector(texts: list, iterations: int) -> dict:
+    from models.fake_detector import FakeDetector
+
+    detector = FakeDetector()
+    return bench(detector.predict, texts, iterations)
+
+
+def bench_medical_extract(texts: list, iterations: int) -> dict:
+    import config
+    from models.medical_classifier import MedicalClassifier
+
+    classifier = MedicalClassifier(**config.keyword_index_options())
+    return bench(classifier.extract, texts, iterations)
+
+
+BENCHMARKS = {
+    'medical_classifier.extract': bench_medical_extract,
+    'fake_detector.predict': bench_fake_detector,
+    'database.store_result': bench_store_result
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for classifier, detector and storage")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--only", choices=sorted(BENCHMARKS), action="append",
+                        help="Run only the named benchmark (repeatable)")
+    parser.add_argument("--output-dir", default=RESULTS_DIR)
+    args = parser.parse_args()
+
+    texts = [record['text'] for record in load_corpus(args.corpus)]
+    results = {}
+    for name in args.only or BENCHMARKS:
+        results[name] = BENCHMARKS[name](texts, args.iterations)
+        print(f"{name}: {results[name]}")
+
+    path = save_results("micro", {'config': vars(args), 'results': results}, args.output_dir)
+    print(f"Results saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import asyncio
+import hashlib
+import random
+from aiohttp import web
+
+
+class UpstreamProfile:
+    """Latency and failure behaviour of one mocked upstream endpoint"""
+
+    def __init__(self, latency_ms: float = 50.0, jitter_ms: float = 20.0, error_rate: float = 0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+
+    async def delay(self, rng: random.Random):
+        latency = max(0.0, self.latency_ms + rng.uniform(-self.jitter_ms, self.jitter_ms))
+        await asyncio.sleep(latency / 1000)
+
+    def should_fail(self, rng: random.Random) -> bool:
+        return rng.random() < self.error_rate
+
+
+def _fake_pmids(term: str, count: int = 3) -> list:
+    digest = int(hashlib.sha1(term.encode()).hexdigest(), 16)
+    return [str(10_000_000 + (digest >> (i * 20)) % 30_000_000) for i in range(count)]
+
+
+class MockUpstreams:
+    """
+    Local stand-ins for the Wikipedia REST summary endpoint and the NCBI
+    esearch/esummary E-utilities, serving the same response shapes the
+    evidence services parse.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8900,
+                 wikipedia: UpstreamProfile = None, pubmed: UpstreamProfile = None, seed: int = 0):
+        self.host = host
+        self.port = port
+        self.wikipedia = wikipedia or UpstreamProfile()
+        self.pubmed = pubmed or UpstreamProfile()
+        self.rng = random.Random(seed)
+        self.request_counts = {'wikipedia_summary': 0, 'pubmed_esearch': 0, 'pubmed_esummary': 0}
+        self._runner = None
+
+    @property
+    def wikipedia_summary_url(self) -> str:
+        return f"http://{self.host}:{self.port}/api/rest_v1/page/summary"
+
+    @property
+    def pubmed_eutils_url(self) -> str:
+        return f"http://{self.host}:{self.port}/entrez/eutils"
+
+    async def _wikipedia_summary(self, request: web.Request) -> web.Response:
+        self.request_counts['wikipedia_summary'] += 1
+        await self.wikipedia.delay(self.rng)
+        if self.wikipedia.should_fail(self.rng):
+            return web.json_response({'title': 'Internal error'}, status=503)
+
+        title = request.match_info['title'].replace('_', ' ')
+        return web.json_response({
+            'type': 'standard',
+            'title': title,
+            'extract': f"{title} is a topic described in this mocked encyclopedia summary. " * 8
+        })
+
+    async def _pubmed_esearch(self, request: web.Request) -> web.Response:
+        self.request_counts['pubmed_esearch'] += 1
+        await self.pubmed.delay(self.rng)
+        if self.pubmed.should_fail(self.rng):
+            return web.Response(status=503, text="Service unavailable")
+
+        pmids = _fake_pmids(request.query.get('term', ''), int(request.query.get('retmax', 3)))
+        ids = "".join(f"<Id>{pmid}</Id>" for pmid in pmids)
+        body = (f'<?xml version="1.0" encoding="UTF-8"?>'
+                f'<eSearchResult><Count>{len(pmids)}</Count><RetMax>{len(pmids)}</RetMax>'
+                f'<IdList>{ids}</IdList></eSearchResult>')
+        return web.Response(text=body, content_type='text/xml')
+
+    async def _pubmed_esummary(self, request: web.Request) -> web.Response:
+        self.request_counts['pubmed_esummary'] += 1
+        await self.pubmed.delay(self.rng)
+        if self.pubmed.should_fail(self.rng):
+            return web.Response(status=503, text="Service unavailable")
+
+        docs = "".join(
+            f'<DocSum><Id>{pmid}</Id>'
+            f'<Item Name="Title" Type="String">Mocked article {pmid}</Item>'
+            f'<Item Name="HasAbstract" Type="Integer">1</Item></DocSum>'
+            for pmid in request.query.get('id', '').split(',') if pmid
+        )
+        body = f'<?xml version="1.0" encoding="UTF-8"?><eSummaryResult>{docs}</eSummaryResult>'
+        return web.Response(text=body, content_type='text/xml')
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/api/rest_v1/page/summary/{title}', self._wikipedia_summary)
+        app.router.add_get('/entrez/eutils/esearch.fcgi', self._pubmed_esearch)
+        app.router.add_get('/entrez/eutils/esummary.fcgi', self._pubmed_esummary)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def _serve_forever(args):
+    mocks = MockUpstreams(
+        args.host, args.port,
+        wikipedia=UpstreamProfile(args.wiki_latency_ms, args.jitter_ms, args.wiki_error_rate),
+        pubmed=UpstreamProfile(args.pubmed_latency_ms, args.jitter_ms, args.pubmed_error_rate)
+    )
+    await mocks.start()
+    print(f"WIKIPEDIA_SUMMARY_URL={mocks.wikipedia_summary_url}")
+    print(f"PUBMED_EUTILS_URL={mocks.pubmed_eutils_url}")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve mock Wikipedia and PubMed endpoints")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--wiki-latency-ms", type=float, default=50.0)
+    parser.add_argument("--pubmed-latency-ms", type=float, default=150.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--wiki-error-rate", type=float, default=0.0)
+    parser.add_argument("--pubmed-error-rate", type=float, default=0.0)
+    asyncio.run(_serve_forever(parser.parse_args()))
@@ -0,0 +1,123 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
+
+# -------------------------------
+# Storage
+# -------------------------------
+DB_PATH = os.getenv("DB_PATH", "medical_detector.db")
+
+# -------------------------------
+# Retention and archival
+# -------------------------------
+# Rows older than this move to monthly archive shards; 0 keeps everything in the hot table
+RETENTION_DAYS = _env_int("RETENTION_DAYS", 0)
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "archive")
+COMPACTION_INTERVAL = _env_float("COMPACTION_INTERVAL", 3600.0)
+COMPACTION_BATCH_SIZE = _env_int("COMPACTION_BATCH_SIZE", 500)
+
+# -------------------------------
+# Medical keyword index
+# -------------------------------
+# Optional extra vocabulary, one term per line
+MEDICAL_VOCABULARY_PATH = os.getenv("MEDICAL_VOCABULARY_PATH") or None
+# Where the encoded index is cached; rebuilt when the model or vocabulary changes
+KEYWORD_INDEX_PATH = os.getenv("KEYWORD_INDEX_PATH") or None
+# "exact" for small vocabularies, "ivf" once brute force becomes the bottleneck
+KEYWORD_INDEX_TYPE = os.getenv("KEYWORD_INDEX_TYPE", "exact")
+IVF_LISTS = _env_int("IVF_LISTS", 0)
+IVF_PROBES = _env_int("IVF_PROBES", 8)
+
+
+def keyword_index_options() -> dict:
+    """MedicalClassifier keyword index arguments from the settings above"""
+    options = {
+        'vocabulary_path': MEDICAL_VOCABULARY_PATH,
+        'index_path': KEYWORD_INDEX_PATH,
+        'index_type': KEYWORD_INDEX_TYPE
+    }
+    if KEYWORD_INDEX_TYPE == "ivf":
+        options['n_probe'] = IVF_PROBES
+        if IVF_LISTS:
+            options['n_lists'] = IVF_LISTS
+    return options
+
+
+# -------------------------------
+# Upstream evidence services
+# -------------------------------
+WIKIPEDIA_SUMMARY_URL = os.getenv("WIKIPEDIA_SUMMARY_URL", "https://en.wikipedia.org/api/rest_v1/page/summary")
+PUBMED_EUTILS_URL = os.getenv("PUBMED_EUTILS_URL", "https://eutils.ncbi.nlm.nih.gov/entrez/eutils")
+# Candidate passages are pooled across sources and re-ranked; only the best are kept
+PUBMED_MAX_ARTICLES = _env_int("PUBMED_MAX_ARTICLES", 5)
+EVIDENCE_TOP_K = _env_int("EVIDENCE_TOP_K", 3)
+EVIDENCE_EMBEDDING_CACHE_SIZE = _env_int("EVIDENCE_EMBEDDING_CACHE_SIZE", 4096)
+
+# -------------------------------
+# Admission control for /analyze
+# -------------------------------
+ADMISSION_MAX_CONCURRENCY = _env_int("ADMISSION_MAX_CONCURRENCY", 8)
+ADMISSION_MAX_QUEUE_INTERACTIVE = _env_int("ADMISSION_MAX_QUEUE_INTERACTIVE", 32)
+ADMISSION_MAX_QUEUE_BATCH = _env_int("ADMISSION_MAX_QUEUE_BATCH", 8)
+# Longest a request may wait for a slot before it is shed
+ADMISSION_QUEUE_TIMEOUT = _env_float("ADMISSION_QUEUE_TIMEOUT", 5.0)
+# Concurrent evidence lookups per /analyze/batch request when evidence is not deferred
+BATCH_EVIDENCE_CONCURRENCY = _env_int("BATCH_EVIDENCE_CONCURRENCY", 8)
+
+# -------------------------------
+# Request deadlines and degradation
+# -------------------------------
+REQUEST_DEADLINE_MS = _env_int("REQUEST_DEADLINE_MS", 10000)
+MAX_REQUEST_DEADLINE_MS = _env_int("MAX_REQUEST_DEADLINE_MS", 30000)
+# Minimum remaining budget for each tier; below it the pipeline degrades one step
+CLASSIFY_MIN_BUDGET_MS = _env_int("CLASSIFY_MIN_BUDGET_MS", 200)
+EVIDENCE_MIN_BUDGET_MS = _env_int("EVIDENCE_MIN_BUDGET_MS", 1000)
+PUBMED_MIN_BUDGET_MS = _env_int("PUBMED_MIN_BUDGET_MS", 3000)
+
+# -------------------------------
+# Deferred evidence job queue
+# -------------------------------
+JOB_QUEUE_DB_PATH = os.getenv("JOB_QUEUE_DB_PATH", "evidence_jobs.db")
+EVIDENCE_WORKERS = _env_int("EVIDENCE_WORKERS", 4)
+JOB_MAX_ATTEMPTS = _env_int("JOB_MAX_ATTEMPTS", 3)
+JOB_POLL_INTERVAL = _env_float("JOB_POLL_INTERVAL", 0.5)
+
+# -------------------------------
+# Live stats stream
+# -------------------------------
+# Stats changes are coalesced and pushed to subscribers at most this often
+STATS_PUBLISH_INTERVAL = _env_float("STATS_PUBLISH_INTERVAL", 1.0)
+# Full recount from the database, to pick up writes made by other processes
+STATS_RESYNC_INTERVAL = _env_float("STATS_RESYNC_INTERVAL", 300.0)
+
+# -------------------------------
+# Admin and profiling
+# -------------------------------
+# Shared secret for /admin endpoints and per-request profiling; they refuse every request while it is empty
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+PROFILING_ENABLED = _env_bool("PROFILING_ENABLED", False)
+PROFILE_INTERVAL_MS = _env_float("PROFILE_INTERVAL_MS", 5.0)
+PROFILE_MAX_STORED = _env_int("PROFILE_MAX_STORED", 50)
+# Process-wide background sampling rate; 0 turns continuous profiling off (as does PROFILING_ENABLED unset)
+CONTINUOUS_PROFILE_HZ = _env_float("CONTINUOUS_PROFILE_HZ", 0.0)
+
+# -------------------------------
+# Logging
+# -------------------------------
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+# Fraction of DEBUG/INFO records emitted; warnings and errors are never sampled out
+LOG_SAMPLE_RATE = _env_float("LOG_SAMPLE_RATE", 1.0)
@@ -0,0 +1,269 @@
+import glob
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import zlib
+from database.db import select_batches, select_page
+
+logger = logging.getLogger(__name__)
+_PERIOD_PATTERN = re.compile(r'^\d{4}-\d{2}')
+# Rows whose timestamp is not ISO formatted cannot be placed in a month
+UNDATED = "undated"
+
+
+def _inflate(body: bytes) -> str:
+    return zlib.decompress(body).decode("utf-8")
+
+
+def period_of(timestamp: str) -> str:
+    """Monthly shard a row belongs to, e.g. '2024-03'"""
+    match = _PERIOD_PATTERN.match(timestamp or "")
+    return match.group() if match else UNDATED
+
+
+class ArchiveStore:
+    """
+    Cold storage for analyses moved out of the hot table: one SQLite file per
+    month. Each shard stores every distinct text body once, zlib-compressed,
+    and the rows reference it by hash. Shards are only opened, and attached
+    read-only, when a query actually needs them.
+    """
+
+    def __init__(self, archive_dir: str = "archive", compression_level: int = 6):
+        self.archive_dir = archive_dir
+        self.compression_level = compression_level
+        self._lock = threading.Lock()
+        # period -> (file signature, shard summary row). Other processes (the ingestion
+        # CLI, a second server) may append too, so an entry is only trusted while the
+        # shard's mtime and size are unchanged
+        self._summaries = {}
+        # Cleared if this SQLite build lacks FTS5; archive search then falls back to LIKE
+        self.fts_enabled = True
+        # Shards known to carry the full-text index
+        self._indexed = set()
+
+    def _path(self, period: str) -> str:
+        return os.path.join(self.archive_dir, f"analyses-{period}.db")
+
+    def periods(self) -> list:
+        names = (os.path.basename(path) for path in glob.glob(os.path.join(self.archive_dir, "analyses-*.db")))
+        return sorted(name[len("analyses-"):-len(".db")] for name in names)
+
+    def _init_shard(self, conn: sqlite3.Connection):
+        conn.executescript('''
+            CREATE TABLE IF NOT EXISTS texts (
+                hash TEXT PRIMARY KEY,
+                body BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS analyses (
+                id INTEGER PRIMARY KEY,
+                text_hash TEXT NOT NULL REFERENCES texts (hash),
+                is_medical BOOLEAN NOT NULL,
+                medical_confidence REAL NOT NULL,
+                is_fake BOOLEAN NOT NULL,
+                fake_confidence REAL NOT NULL,
+                timestamp TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_analyses_timestamp ON analyses (timestamp);
+            CREATE INDEX IF NOT EXISTS idx_analyses_fake_id ON analyses (is_fake, id);
+            CREATE TABLE IF NOT EXISTS summary (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                rows INTEGER NOT NULL,
+                medical INTEGER NOT NULL,
+                fake INTEGER NOT NULL,
+                min_id INTEGER,
+                max_id INTEGER
+            );
+            INSERT OR IGNORE INTO summary VALUES (0, 0, 0, 0, NULL, NULL);
+        ''')
+        return self._init_fts(conn)
+
+    def _init_fts(self, conn: sqlite3.Connection) -> bool:
+        """
+        Contentless full-text index over the shard's texts, keyed by analysis id, so
+        archive search matches words the same way as the hot table's `analyses_fts`.
+        Shards archived before it existed are indexed on first use. Returns False
+        when this SQLite build lacks FTS5.
+        """
+        if not self.fts_enabled:
+            return False
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'analyses_fts'").fetchone() is None:
+                conn.execute("CREATE VIRTUAL TABLE analyses_fts USING fts5(text, content='')")
+                conn.execute('''
+                    INSERT INTO analyses_fts (rowid, text)
+                    SELECT a.id, inflate(t.body) FROM analyses a JOIN texts t ON t.hash = a.text_hash
+                ''')
+            conn.execute('COMMIT')
+        except sqlite3.OperationalError as e:
+            conn.execute('ROLLBACK')
+            if "fts5" not in str(e):
+                raise
+            logger.warning("FTS5 unavailable, archive search will scan: %s", e)
+            self.fts_enabled = False
+            return False
+        return True
+
+    def _open(self, period: str) -> sqlite3.Connection:
+        """Read-write connection to a shard, created and upgraded to the current schema"""
+        conn = sqlite3.connect(self._path(period), isolation_level=None)
+        conn.create_function("inflate", 1, _inflate, deterministic=True)
+        try:
+            if self._init_shard(conn):
+                self._indexed.add(period)
+        except BaseException:
+            conn.close()
+            raise
+        return conn
+
+    def _signature(self, period: str) -> tuple:
+        stat = os.stat(self._path(period))
+        return stat.st_mtime_ns, stat.st_size
+
+    def append(self, period: str, records: list) -> int:
+        """
+        Archive `records` into the shard for `period` in one transaction and
+        return how many were new. Rows already archived are skipped, so a batch
+        retried after a crash is never counted twice.
+        """
+        with self._lock:
+            os.makedirs(self.archive_dir, exist_ok=True)
+            conn = self._open(period)
+            try:
+                indexed = period in self._indexed
+                conn.execute('BEGIN IMMEDIATE')
+                added = {'rows': 0, 'medical': 0, 'fake': 0}
+                for record in records:
+                    body = record['text'].encode("utf-8")
+                    text_hash = hashlib.sha1(body).hexdigest()
+                    conn.execute('INSERT OR IGNORE INTO texts (hash, body) VALUES (?, ?)',
+                                 (text_hash, zlib.compress(body, self.compression_level)))
+                    inserted = conn.execute('''
+                        INSERT OR IGNORE INTO analyses
+                            (id, text_hash, is_medical, medical_confidence, is_fake, fake_confidence, timestamp)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ''', (
+                        record['id'], text_hash, record['is_medical'], record['medical_confidence'],
+                        record['is_fake'], record['fake_confidence'], record['timestamp']
+                    )).rowcount
+                    if inserted:
+                        if indexed:
+                            conn.execute('INSERT INTO analyses_fts (rowid, text) VALUES (?, ?)',
+                                         (record['id'], record['text']))
+                        added['rows'] += 1
+                        added['medical'] += bool(record['is_medical'])
+                        added['fake'] += bool(record['is_fake'])
+
+                ids = [record['id'] for record in records]
+                conn.execute('''
+                    UPDATE summary SET rows = rows + ?, medical = medical + ?, fake = fake + ?,
+                                       min_id = min(coalesce(min_id, ?), ?), max_id = max(coalesce(max_id, ?), ?)
+                    WHERE id = 0
+                ''', (added['rows'], added['medical'], added['fake'], min(ids), min(ids), max(ids), max(ids)))
+                conn.execute('COMMIT')
+                # Signature first: a concurrent writer landing in between only forces a reread
+                signature = self._signature(period)
+                summary = self._read_summary(conn)
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                raise
+            finally:
+                conn.close()
+            self._summaries[period] = (signature, summary)
+            return added['rows']
+
+    @staticmethod
+    def _read_summary(conn: sqlite3.Connection) -> dict:
+        conn.row_factory = sqlite3.Row
+        return dict(conn.execute('SELECT rows, medical, fake, min_id, max_id FROM summary').fetchone())
+
+    def _load_summaries(self) -> dict:
+        """Summary of every shard, rereading only shards that changed since the last call"""
+        with self._lock:
+            summaries = {}
+            for period in self.periods():
+                signature = self._signature(period)
+                cached = self._summaries.get(period)
+                if cached is None or cached[0] != signature:
+                    conn = sqlite3.connect(f"file:{self._path(period)}?mode=ro", uri=True,
+                                           check_same_thread=False)
+                    try:
+                        cached = (signature, self._read_summary(conn))
+                    finally:
+                        conn.close()
+                summaries[period] = cached
+            self._summaries = summaries
+            return {period: summary for period, (_, summary) in summaries.items()}
+
+    def totals(self) -> dict:
+        """Row, medical and fake counts across every shard, without scanning any of them"""
+        totals = {'rows': 0, 'medical': 0, 'fake': 0}
+        for summary in self._load_summaries().values():
+            for key in totals:
+                totals[key] += summary[key]
+        return totals
+
+    def _shards(self, since: str = None, until: str = None, cursor: int = None) -> list:
+        """Periods that can hold matching rows, oldest first"""
+        selected = []
+        for period, summary in sorted(self._load_summaries().items()):
+            if not summary['rows']:
+                continue
+            if cursor is not None and summary['min_id'] >= cursor:
+                continue
+            if period != UNDATED:
+                if since is not None and period < since[:7]:
+                    continue
+                if until is not None and period > until[:7]:
+                    continue
+            selected.append(period)
+        return selected
+
+    def _attach(self, period: str) -> tuple:
+        """
+        An in-memory connection with the shard attached read-only, exposed as an
+        `analyses` view with the hot table's columns so the same queries run on both,
+        and whether the shard's `analyses_fts` index can serve text search.
+        """
+        if self.fts_enabled and period not in self._indexed:
+            with self._lock:
+                # Shards archived before the full-text index existed are upgraded once
+                self._open(period).close()
+        # Exports iterate this connection from successive threadpool workers; see Database.iter_analyses
+        conn = sqlite3.connect("file::memory:", uri=True, check_same_thread=False)
+        conn.create_function("inflate", 1, _inflate, deterministic=True)
+        conn.execute('ATTACH DATABASE ? AS shard', (f"file:{self._path(period)}?mode=ro",))
+        conn.execute('''
+            CREATE TEMP VIEW analyses AS
+            SELECT a.id, inflate(t.body) AS text, a.is_medical, a.medical_confidence,
+                   a.is_fake, a.fake_confidence, a.timestamp
+            FROM shard.analyses a JOIN shard.texts t ON t.hash = a.text_hash
+        ''')
+        # Unqualified, `analyses_fts` in filter_clause resolves to the shard's index
+        return conn, self.fts_enabled
+
+    def get_analyses(self, limit: int, cursor: int = None, **filters) -> list:
+        """Up to `limit` archived records below `cursor`, newest first, merged across shards"""
+        records = []
+        for period in self._shards(filters.get('since'), filters.get('until'), cursor):
+            conn, fts_enabled = self._attach(period)
+            try:
+                records += select_page(conn, limit, cursor, fts_enabled, **filters)
+            finally:
+                conn.close()
+        records.sort(key=lambda record: record['id'], reverse=True)
+        return records[:limit]
+
+    def iter_analyses(self, batch_size: int = 1000, **filters):
+        """Archived records in batches, shard by shard from the oldest"""
+        for period in self._shards(filters.get('since'), filters.get('until')):
+            conn, fts_enabled = self._attach(period)
+            try:
+                yield from select_batches(conn, batch_size, fts_enabled, **filters)
+            finally:
+                conn.close()
@@ -1,11 +1,94 @@
 import sqlite3
 from datetime import datetime
 import json
+import logging
+from metrics import DB_LATENCY
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_COLUMNS = ('id', 'text', 'is_medical', 'medical_confidence', 'is_fake', 'fake_confidence', 'timestamp')
+
+
+def _fts_query(search: str) -> str:
+    """Quote every word so user input is matched literally instead of parsed as FTS syntax"""
+    return " ".join('"' + word.replace('"', '""') + '"' for word in search.split())
+
+
+def row_to_record(row: sqlite3.Row) -> dict:
+    record = dict(row)
+    record['is_medical'] = bool(record['is_medical'])
+    record['is_fake'] = bool(record['is_fake'])
+    return record
+
+
+def filter_clause(fts_enabled: bool = False, cursor: int = None, since: str = None, until: str = None,
+                  is_fake: bool = None, min_confidence: float = None, max_confidence: float = None,
+                  search: str = None) -> tuple[str, list]:
+    """
+    WHERE clause over an `analyses a` row source, shared by the hot table and
+    the archive shards. Confidence bounds apply to fake_confidence.
+    """
+    conditions, params = [], []
+    if cursor is not None:
+        conditions.append('a.id < ?')
+        params.append(cursor)
+    if since is not None:
+        conditions.append('a.timestamp >= ?')
+        params.append(since)
+    if until is not None:
+        conditions.append('a.timestamp < ?')
+        params.append(until)
+    if is_fake is not None:
+        conditions.append('a.is_fake = ?')
+        params.append(int(is_fake))
+    if min_confidence is not None:
+        conditions.append('a.fake_confidence >= ?')
+        params.append(min_confidence)
+    if max_confidence is not None:
+        conditions.append('a.fake_confidence <= ?')
+        params.append(max_confidence)
+    if search:
+        if fts_enabled:
+            conditions.append('a.id IN (SELECT rowid FROM analyses_fts WHERE analyses_fts MATCH ?)')
+            params.append(_fts_query(search))
+        else:
+            conditions.append('a.text LIKE ?')
+            params.append(f"%{search}%")
+    return ("WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+
+def select_page(conn: sqlite3.Connection, limit: int, cursor: int = None,
+                fts_enabled: bool = False, **filters) -> list:
+    """Up to `limit` matching records with id below `cursor`, newest first"""
+    where, params = filter_clause(fts_enabled, cursor, **filters)
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute(f'''
+        SELECT {", ".join("a." + c for c in ANALYSIS_COLUMNS)} FROM analyses a
+        {where} ORDER BY a.id DESC LIMIT ?
+    ''', params + [limit]).fetchall()
+    return [row_to_record(row) for row in rows]
+
+
+def select_batches(conn: sqlite3.Connection, batch_size: int, fts_enabled: bool = False, **filters):
+    """All matching records in id order, streamed from one cursor `batch_size` at a time"""
+    where, params = filter_clause(fts_enabled, **filters)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.execute(f'''
+        SELECT {", ".join("a." + c for c in ANALYSIS_COLUMNS)} FROM analyses a
+        {where} ORDER BY a.id
+    ''', params)
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        yield [row_to_record(row) for row in rows]
 
 
 class Database:
-    def __init__(self, db_path="medical_detector.db"):
+    def __init__(self, db_path="medical_detector.db", archive=None):
+        """`archive` is an optional ArchiveStore holding rows moved out by retention"""
         self.db_path = db_path
+        self.archive = archive
         self.init_db()
 
     def init_db(self):
@@ -13,6 +96,10 @@ class Database:
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
 
+        # Only takes effect on a new file; lets retention hand freed pages back to the OS
+        cursor.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        # WAL lets history reads and long exports run alongside inserts
+        cursor.execute('PRAGMA journal_mode=WAL')
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS analyses (
                                                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -25,13 +112,58 @@ class Database:
                                                     NULL
             )
         ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_analyses_timestamp ON analyses (timestamp)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_analyses_fake_id ON analyses (is_fake, id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_analyses_fake_confidence ON analyses (fake_confidence)')
+        self.fts_enabled = self._init_fts(cursor)
 
         conn.commit()
         conn.close()
 
-    def store_result(self, result: dict):
-        """Store analysis result"""
-        conn = sqlite3.connect(self.db_path)
+    def _init_fts(self, cursor) -> bool:
+        """
+        Full-text index over `analyses.text`, kept in sync by triggers. Returns
+        False when this SQLite build lacks FTS5; text search then falls back to LIKE.
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'analyses_fts'")
+        exists = cursor.fetchone() is not None
+        try:
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS analyses_fts
+                USING fts5(text, content='analyses', content_rowid='id')
+            ''')
+        except sqlite3.OperationalError as e:
+            logger.warning("FTS5 unavailable, text search will scan: %s", e)
+            return False
+
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS analyses_fts_insert AFTER INSERT ON analyses BEGIN
+                INSERT INTO analyses_fts (rowid, text) VALUES (new.id, new.text);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS analyses_fts_delete AFTER DELETE ON analyses BEGIN
+                INSERT INTO analyses_fts (analyses_fts, rowid, text) VALUES ('delete', old.id, old.text);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS analyses_fts_update AFTER UPDATE OF text ON analyses BEGIN
+                INSERT INTO analyses_fts (analyses_fts, rowid, text) VALUES ('delete', old.id, old.text);
+                INSERT INTO analyses_fts (rowid, text) VALUES (new.id, new.text);
+            END
+        ''')
+        if not exists:
+            # Index rows stored before full-text search was added
+            cursor.execute("INSERT INTO analyses_fts (analyses_fts) VALUES ('rebuild')")
+        return True
+
+    def store_result(self, result: dict, timeout: float = 5.0):
+        """Store analysis result, waiting at most `timeout` seconds for the write lock"""
+        with DB_LATENCY.labels(operation="store_result").time():
+            self._store_result(result, timeout)
+
+    def _store_result(self, result: dict, timeout: float):
+        conn = sqlite3.connect(self.db_path, timeout=timeout)
         cursor = conn.cursor()
 
         cursor.execute('''
@@ -49,8 +181,29 @@ class Database:
         conn.commit()
         conn.close()
 
+    def store_results(self, results: list, timeout: float = 5.0):
+        """Store many analysis results in one transaction"""
+        with DB_LATENCY.labels(operation="store_results").time():
+            conn = sqlite3.connect(self.db_path, timeout=timeout)
+            try:
+                conn.executemany('''
+                    INSERT INTO analyses (text, is_medical, medical_confidence, is_fake, fake_confidence, timestamp)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', [
+                    (r['text'], r['is_medical'], r['medical_confidence'], r['is_fake'],
+                     r['fake_confidence'], r['timestamp'])
+                    for r in results
+                ])
+                conn.commit()
+            finally:
+                conn.close()
+
     def get_stats(self) -> dict:
         """Get analysis statistics"""
+        with DB_LATENCY.labels(operation="get_stats").time():
+            return self._get_stats()
+
+    def _get_stats(self) -> dict:
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
 
@@ -75,11 +228,106 @@ class Database:
 
         conn.close()
 
+        archived = {'rows': 0, 'medical': 0, 'fake': 0}
+        if self.archive is not None:
+            archived = self.archive.totals()
+        total += archived['rows']
+        medical_count += archived['medical']
+        fake_count += archived['fake']
+
         return {
             'total_analyses': total,
+            'archived_analyses': archived['rows'],
             'medical_posts': medical_count,
             'fake_posts': fake_count,
             'recent_analyses': recent_count,
             'medical_percentage': round((medical_count / max(total, 1)) * 100, 1),
             'fake_percentage': round((fake_count / max(medical_count, 1)) * 100, 1)
-        }
\ No newline at end of file
+        }
+
+    def get_analyses(self, limit: int = 50, cursor: int = None, include_archive: bool = False,
+                     **filters) -> dict:
+        """
+        One page of stored analyses, newest first. Pass the returned
+        `next_cursor` back as `cursor` for the following page; keyset
+        pagination keeps every page an index seek however deep it is.
+        With `include_archive`, archived rows are merged in by id.
+        """
+        with DB_LATENCY.labels(operation="get_analyses").time():
+            return self._get_analyses(limit, cursor, include_archive, **filters)
+
+    def _get_analyses(self, limit: int, cursor: int, include_archive: bool, **filters) -> dict:
+        conn = sqlite3.connect(self.db_path)
+        try:
+            # The extra row only tells us whether another page exists
+            items = select_page(conn, limit + 1, cursor, self.fts_enabled, **filters)
+        finally:
+            conn.close()
+
+        if include_archive and self.archive is not None:
+            items += self.archive.get_analyses(limit + 1, cursor, **filters)
+            items.sort(key=lambda record: record['id'], reverse=True)
+
+        next_cursor = items[limit - 1]['id'] if len(items) > limit else None
+        return {'items': items[:limit], 'next_cursor': next_cursor}
+
+    def iter_analyses(self, batch_size: int = 1000, include_archive: bool = False, **filters):
+        """
+        Yield matching analyses in id order, `batch_size` rows at a time, from a
+        single read-only cursor. Memory stays constant however many rows match,
+        and under WAL the reader never blocks concurrent inserts. Archived rows,
+        when included, come first, one shard at a time.
+        """
+        if include_archive and self.archive is not None:
+            yield from self.archive.iter_analyses(batch_size, **filters)
+
+        # Streaming responses resume the generator on whichever threadpool worker is
+        # free; access is still serialized, so the connection may follow it across threads
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+        try:
+            yield from select_batches(conn, batch_size, self.fts_enabled, **filters)
+        finally:
+            conn.close()
+
+    def get_recent_buckets(self, cutoff: str) -> dict:
+        """Rows stored after `cutoff`, counted per minute ('YYYY-MM-DDTHH:MM')"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            rows = conn.execute('''
+                SELECT substr(timestamp, 1, 16) AS minute, COUNT(*) FROM analyses
+                WHERE timestamp > ? GROUP BY minute
+            ''', (cutoff,)).fetchall()
+        finally:
+            conn.close()
+        return dict(rows)
+
+    def get_expired(self, cutoff: str, limit: int) -> list:
+        """The oldest rows stored before `cutoff`, for the compactor to archive"""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            rows = conn.execute(f'''
+                SELECT {", ".join(ANALYSIS_COLUMNS)} FROM analyses
+                WHERE timestamp < ? ORDER BY id LIMIT ?
+            ''', (cutoff, limit)).fetchall()
+        finally:
+            conn.close()
+        return [row_to_record(row) for row in rows]
+
+    def delete_analyses(self, ids: list, timeout: float = 5.0):
+        """Drop archived rows from the hot table in one short write transaction"""
+        with DB_LATENCY.labels(operation="delete_analyses").time():
+            conn = sqlite3.connect(self.db_path, timeout=timeout)
+            try:
+                conn.execute(f'DELETE FROM analyses WHERE id IN ({", ".join("?" * len(ids))})', ids)
+                conn.commit()
+            finally:
+                conn.close()
+
+    def reclaim_space(self, pages: int = 1000):
+        """Return up to `pages` free pages to the OS (a no-op unless auto_vacuum is incremental)"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute(f'PRAGMA incremental_vacuum({int(pages)})')
+        finally:
+            conn.close()
@@ -0,0 +1,34 @@
+import csv
+import io
+import json
+from database.db import ANALYSIS_COLUMNS
+
+EXPORT_MEDIA_TYPES = {
+    'ndjson': "application/x-ndjson",
+    'csv': "text/csv"
+}
+
+
+def ndjson_chunks(batches):
+    """One JSON object per line, one string per batch of rows"""
+    for batch in batches:
+        yield "".join(json.dumps(row) + "\n" for row in batch)
+
+
+def csv_chunks(batches):
+    """A header line, then one string of CSV rows per batch"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=ANALYSIS_COLUMNS)
+    writer.writeheader()
+    yield buffer.getvalue()
+    for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(batch)
+        yield buffer.getvalue()
+
+
+EXPORT_FORMATS = {
+    'ndjson': ndjson_chunks,
+    'csv': csv_chunks
+}
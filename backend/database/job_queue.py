@@ -0,0 +1,253 @@
+import sqlite3
+import json
+import time
+import uuid
+from datetime import datetime
+
+
+class JobQueue:
+    """
+    Durable SQLite-backed queue for deferred evidence enrichment.
+
+    Jobs sharing a dedup key (derived from the evidence search terms) are
+    resolved together from a single upstream lookup: a job is not claimed while
+    another with its key is running, and the lookup result is kept in
+    `evidence_results` so later jobs with the same key complete at enqueue
+    time without touching Wikipedia or PubMed.
+    """
+
+    def __init__(self, db_path="evidence_jobs.db", max_attempts: int = 3, retry_backoff: float = 2.0):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.init_db()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def init_db(self):
+        """Initialize the job tables and requeue jobs left running by a previous process"""
+        conn = self._connect()
+        cursor = conn.cursor()
+
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                dedup_key TEXT NOT NULL,
+                text TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                evidence TEXT,
+                sources TEXT,
+                available_at REAL NOT NULL,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        ''')
+        # Per-job results, for partial lookups that are not cached; added after the table shipped
+        columns = {row['name'] for row in cursor.execute('PRAGMA table_info(jobs)')}
+        for column in ('evidence', 'sources'):
+            if column not in columns:
+                cursor.execute(f'ALTER TABLE jobs ADD COLUMN {column} TEXT')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status_available ON jobs (status, available_at)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_jobs_dedup_key ON jobs (dedup_key)')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS evidence_results (
+                dedup_key TEXT PRIMARY KEY,
+                evidence TEXT NOT NULL,
+                sources TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            )
+        ''')
+        cursor.execute("UPDATE jobs SET status = 'queued' WHERE status = 'running'")
+        # Empty results are no longer cached; drop any left by earlier versions
+        cursor.execute("DELETE FROM evidence_results WHERE sources = '[]'")
+
+        conn.close()
+
+    def enqueue(self, text: str, dedup_key: str) -> str:
+        """Create a job and return its ID"""
+        job_id = uuid.uuid4().hex
+        now = datetime.now().isoformat()
+        conn = self._connect()
+        cursor = conn.cursor()
+
+        cursor.execute('SELECT 1 FROM evidence_results WHERE dedup_key = ?', (dedup_key,))
+        status = 'done' if cursor.fetchone() else 'queued'
+        cursor.execute('''
+            INSERT INTO jobs (id, dedup_key, text, status, available_at, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (job_id, dedup_key, text, status, time.time(), now, now))
+
+        conn.close()
+        return job_id
+
+    def enqueue_many(self, items: list) -> list:
+        """Create one job per (text, dedup_key) pair in a single transaction and return their IDs"""
+        now = datetime.now().isoformat()
+        job_ids = [uuid.uuid4().hex for _ in items]
+        conn = self._connect()
+        cursor = conn.cursor()
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            for job_id, (text, dedup_key) in zip(job_ids, items):
+                cursor.execute('SELECT 1 FROM evidence_results WHERE dedup_key = ?', (dedup_key,))
+                status = 'done' if cursor.fetchone() else 'queued'
+                cursor.execute('''
+                    INSERT INTO jobs (id, dedup_key, text, status, available_at, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (job_id, dedup_key, text, status, time.time(), now, now))
+            cursor.execute('COMMIT')
+        except Exception:
+            cursor.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+        return job_ids
+
+    def claim(self):
+        """
+        Atomically take the oldest runnable job whose key is not already being
+        looked up, or return None. The job carries `claimed_at`, when its lookup started.
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('''
+                SELECT id, dedup_key, text, attempts FROM jobs
+                WHERE status = 'queued' AND available_at <= ?
+                  AND dedup_key NOT IN (SELECT dedup_key FROM jobs WHERE status = 'running')
+                ORDER BY available_at
+                LIMIT 1
+            ''', (time.time(),))
+            row = cursor.fetchone()
+            if row is None:
+                cursor.execute('COMMIT')
+                return None
+
+            claimed_at = datetime.now().isoformat()
+            cursor.execute('''
+                UPDATE jobs SET status = 'running', attempts = attempts + 1, updated_at = ?
+                WHERE id = ?
+            ''', (claimed_at, row['id']))
+            cursor.execute('COMMIT')
+            return {**dict(row), 'attempts': row['attempts'] + 1, 'claimed_at': claimed_at}
+        except Exception:
+            cursor.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def get_result(self, dedup_key: str):
+        """Return (evidence, sources) for a dedup key, or None if not resolved yet"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('SELECT evidence, sources FROM evidence_results WHERE dedup_key = ?', (dedup_key,))
+        row = cursor.fetchone()
+        conn.close()
+        return (row['evidence'], json.loads(row['sources'])) if row else None
+
+    def complete(self, dedup_key: str, evidence: str, sources: list, job_id: str = None,
+                 claimed_at: str = None, partial: bool = False):
+        """
+        Finish a job with its result. A non-empty result is cached and finishes
+        every pending job waiting on the same key. An empty one ("No evidence
+        found.") is never cached: it finishes `job_id` and the jobs with the same
+        key queued before its lookup started at `claimed_at`, which would only
+        repeat it, while jobs enqueued later look again. A `partial` result (some
+        source never answered) is kept on `job_id` alone and never cached.
+        """
+        now = datetime.now().isoformat()
+        conn = self._connect()
+        cursor = conn.cursor()
+
+        cursor.execute('BEGIN IMMEDIATE')
+        if partial:
+            cursor.execute('''
+                UPDATE jobs SET status = 'done', error = NULL, evidence = ?, sources = ?, updated_at = ?
+                WHERE id = ?
+            ''', (evidence, json.dumps(sources), now, job_id))
+        elif sources:
+            cursor.execute('''
+                INSERT OR REPLACE INTO evidence_results (dedup_key, evidence, sources, created_at)
+                VALUES (?, ?, ?, ?)
+            ''', (dedup_key, evidence, json.dumps(sources), now))
+            cursor.execute('''
+                UPDATE jobs SET status = 'done', error = NULL, updated_at = ?
+                WHERE dedup_key = ? AND status IN ('queued', 'running')
+            ''', (now, dedup_key))
+        else:
+            cursor.execute('''
+                UPDATE jobs SET status = 'done', error = NULL, updated_at = ?
+                WHERE id = ? OR (dedup_key = ? AND status = 'queued' AND created_at <= ?)
+            ''', (now, job_id, dedup_key, claimed_at or ''))
+        cursor.execute('COMMIT')
+
+        conn.close()
+
+    def fail(self, job_id: str, attempts: int, error: str):
+        """Schedule a retry with exponential backoff, or mark the job failed"""
+        now = datetime.now().isoformat()
+        conn = self._connect()
+        cursor = conn.cursor()
+
+        if attempts < self.max_attempts:
+            cursor.execute('''
+                UPDATE jobs SET status = 'queued', error = ?, available_at = ?, updated_at = ?
+                WHERE id = ?
+            ''', (error, time.time() + self.retry_backoff ** attempts, now, job_id))
+        else:
+            cursor.execute('''
+                UPDATE jobs SET status = 'failed', error = ?, updated_at = ?
+                WHERE id = ?
+            ''', (error, now, job_id))
+
+        conn.close()
+
+    def get_jobs(self, job_ids: list) -> list:
+        """Fetch job status, with evidence attached for completed jobs"""
+        if not job_ids:
+            return []
+        conn = self._connect()
+        cursor = conn.cursor()
+
+        placeholders = ','.join('?' * len(job_ids))
+        cursor.execute(f'''
+            SELECT j.id, j.status, j.attempts, j.error, j.created_at, j.updated_at,
+                   coalesce(j.evidence, r.evidence) AS evidence, coalesce(j.sources, r.sources) AS sources
+            FROM jobs j
+            LEFT JOIN evidence_results r ON r.dedup_key = j.dedup_key AND j.status = 'done'
+            WHERE j.id IN ({placeholders})
+        ''', job_ids)
+        rows = cursor.fetchall()
+        conn.close()
+
+        return [{
+            'job_id': row['id'],
+            'status': row['status'],
+            'attempts': row['attempts'],
+            'error': row['error'],
+            # Done without a cached result means the lookup found nothing
+            'evidence': row['evidence'] or ("No evidence found." if row['status'] == 'done' else None),
+            'sources': json.loads(row['sources']) if row['sources'] else [],
+            'created_at': row['created_at'],
+            'updated_at': row['updated_at']
+        } for row in rows]
+
+    def get_job(self, job_id: str):
+        jobs = self.get_jobs([job_id])
+        return jobs[0] if jobs else None
+
+    def get_counts(self) -> dict:
+        """Number of jobs per status"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status')
+        counts = {status: count for status, count in cursor.fetchall()}
+        conn.close()
+        return counts
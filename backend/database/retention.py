@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from database.db import Database
+from database.archive import ArchiveStore, period_of
+from metrics import ARCHIVED_ROWS, DB_LATENCY
+
+logger = logging.getLogger(__name__)
+
+
+class Compactor:
+    """
+    Moves analyses older than `retention_days` from the hot table into the
+    monthly archive shards. Work is done in small batches: each batch is
+    committed to the archive first and only then deleted from the hot table,
+    so a crash in between leaves a row in both places (and the retry skips
+    it) rather than in neither. Each delete is its own short transaction, so
+    `store_result` never waits on more than one batch.
+    """
+
+    def __init__(self, db: Database, archive: ArchiveStore, retention_days: int,
+                 batch_size: int = 500, pause: float = 0.05):
+        self.db = db
+        self.archive = archive
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.pause = pause
+
+    def compact(self, now: datetime = None, stop: threading.Event = None) -> int:
+        """Archive every expired row; returns how many rows left the hot table"""
+        cutoff = ((now or datetime.now()) - timedelta(days=self.retention_days)).isoformat()
+        moved = 0
+        while stop is None or not stop.is_set():
+            with DB_LATENCY.labels(operation="compact_batch").time():
+                batch = self.db.get_expired(cutoff, self.batch_size)
+                if not batch:
+                    break
+                self._archive_batch(batch)
+            moved += len(batch)
+            # Leave gaps for writers between batches
+            time.sleep(self.pause)
+
+        if moved:
+            self.db.reclaim_space()
+        return moved
+
+    def _archive_batch(self, batch: list):
+        by_period = defaultdict(list)
+        for record in batch:
+            by_period[period_of(record['timestamp'])].append(record)
+        for period, records in by_period.items():
+            ARCHIVED_ROWS.inc(self.archive.append(period, records), period=period)
+        self.db.delete_analyses([record['id'] for record in batch])
+
+
+class RetentionWorker:
+    """Runs the compactor periodically in a background thread"""
+
+    def __init__(self, compactor: Compactor, interval: float = 3600.0):
+        self.compactor = compactor
+        self.interval = interval
+        self._task = None
+        self._stop = threading.Event()
+
+    def start(self):
+        self._stop.clear()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        # Lets an in-progress compaction finish its current batch and return
+        self._stop.set()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                moved = await asyncio.to_thread(self.compactor.compact, stop=self._stop)
+                if moved:
+                    logger.info("Archived %s analyses older than %s days", moved, self.compactor.retention_days)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Compaction failed: %s", e)
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,35 @@
+import time
+
+# Degradation tiers, from most to least complete
+TIER_FULL = "full"
+TIER_NO_PUBMED = "no_pubmed"
+# PubMed answered but Wikipedia did not; as complete as TIER_NO_PUBMED
+TIER_NO_WIKIPEDIA = "no_wikipedia"
+TIER_NO_EVIDENCE = "no_evidence"
+TIER_LEXICAL_ONLY = "lexical_only"
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class Deadline:
+    """Absolute end-to-end budget for one request, shared by every stage it passes through"""
+
+    def __init__(self, budget: float):
+        self.budget = budget
+        self.expires_at = time.monotonic() + budget
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def cap(self, timeout: float) -> float:
+        """A stage's own timeout, shortened to whatever budget is left"""
+        return min(timeout, self.remaining())
+
+
+def cap_timeout(deadline: Deadline, timeout: float) -> float:
+    return deadline.cap(timeout) if deadline else timeout
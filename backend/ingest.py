@@ -0,0 +1,87 @@
+import argparse
+import asyncio
+import logging
+from models.medical_classifier import MedicalClassifier
+from models.fake_detector import FakeDetector
+from models.evidence_ranker import EvidenceRanker
+from services.wikipedia_service import WikipediaService
+from services.pubmed_service import PubMedService
+from services.evidence_service import EvidenceService
+from database.db import Database
+from ingestion.sources import JsonlFileSource, StdinSource, SocketSource
+from ingestion.pipeline import DeadLetterLog, IngestionPipeline, OffsetCheckpoint
+from ingestion.stages import build_stages
+from log import configure_logging
+import config
+
+logger = logging.getLogger(__name__)
+
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Stream posts through the misinformation detection pipeline")
+    parser.add_argument("--source", choices=["file", "stdin", "socket"], default="file")
+    parser.add_argument("--path", help="JSONL file to tail (file source)")
+    parser.add_argument("--no-follow", action="store_true", help="Stop at end of file instead of tailing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--checkpoint", help="Offset checkpoint file (file source only)")
+    parser.add_argument("--queue-size", type=int, default=100)
+    parser.add_argument("--classify-workers", type=int, default=2)
+    parser.add_argument("--detect-workers", type=int, default=1)
+    parser.add_argument("--evidence-workers", type=int, default=8)
+    parser.add_argument("--store-workers", type=int, default=1)
+    parser.add_argument("--report-interval", type=float, default=10.0)
+    parser.add_argument("--max-attempts", type=positive_int, default=3, help="Tries per stage before a post is dead-lettered")
+    parser.add_argument("--retry-backoff", type=float, default=0.5, help="Seconds before the first retry, doubling after")
+    parser.add_argument("--dead-letter", help="JSONL file for posts that exhaust their retries")
+    return parser.parse_args()
+
+
+async def run(args):
+    checkpoint = OffsetCheckpoint(args.checkpoint if args.source == "file" else None)
+
+    if args.source == "file":
+        if not args.path:
+            raise SystemExit("--path is required for the file source")
+        source = JsonlFileSource(args.path, start_offset=checkpoint.committed, follow=not args.no_follow)
+    elif args.source == "socket":
+        source = SocketSource(args.host, args.port, maxsize=args.queue_size)
+    else:
+        source = StdinSource()
+
+    medical_classifier = MedicalClassifier(**config.keyword_index_options())
+    wikipedia_service = WikipediaService(config.WIKIPEDIA_SUMMARY_URL)
+    pubmed_service = PubMedService(config.PUBMED_EUTILS_URL, max_articles=config.PUBMED_MAX_ARTICLES)
+    evidence_ranker = EvidenceRanker(medical_classifier.model, cache_size=config.EVIDENCE_EMBEDDING_CACHE_SIZE)
+    stages = build_stages(
+        medical_classifier,
+        FakeDetector(),
+        EvidenceService(wikipedia_service, pubmed_service,
+                        ranker=evidence_ranker, top_k=config.EVIDENCE_TOP_K),
+        Database(config.DB_PATH),
+        workers={
+            'classify': args.classify_workers,
+            'detect': args.detect_workers,
+            'evidence': args.evidence_workers,
+            'store': args.store_workers
+        },
+        queue_size=args.queue_size
+    )
+
+    pipeline = IngestionPipeline(source, stages, checkpoint=checkpoint, report_interval=args.report_interval,
+                                 dead_letter=DeadLetterLog(args.dead_letter), max_attempts=args.max_attempts,
+                                 retry_backoff=args.retry_backoff)
+    report = await pipeline.run()
+    logger.info("Ingestion finished: %s", report)
+
+
+if __name__ == "__main__":
+    configure_logging(config.LOG_LEVEL, config.LOG_SAMPLE_RATE)
+    asyncio.run(run(parse_args()))
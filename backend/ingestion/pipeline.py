@@ -0,0 +1,249 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from metrics import INGEST_STAGE_LATENCY
+
+logger = logging.getLogger(__name__)
+
+
+class Stage:
+    """
+    One pipeline stage. `handler` is an async callable taking a post dict and
+    returning the (possibly enriched) post, or None to drop it from the pipeline.
+    """
+
+    def __init__(self, name: str, handler, workers: int = 1, queue_size: int = 100):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.queue_size = queue_size
+
+
+class StageStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.retries = 0
+        self.busy_time = 0.0
+        self.started_at = None
+
+    def record(self, elapsed: float):
+        if self.started_at is None:
+            self.started_at = time.monotonic() - elapsed
+        self.processed += 1
+        self.busy_time += elapsed
+
+    def snapshot(self, queue_depth: int) -> dict:
+        elapsed = time.monotonic() - self.started_at if self.started_at else 0.0
+        return {
+            'stage': self.name,
+            'processed': self.processed,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'retries': self.retries,
+            'queue_depth': queue_depth,
+            'posts_per_second': round(self.processed / elapsed, 2) if elapsed > 0 else 0.0,
+            'avg_latency_ms': round(self.busy_time / max(self.processed, 1) * 1000, 2)
+        }
+
+
+class OffsetCheckpoint:
+    """
+    Tracks in-flight source offsets and persists the highest offset below which
+    every post has left the pipeline. Posts finish out of order across workers,
+    so only the contiguous completed prefix is ever committed.
+    """
+
+    def __init__(self, path: str = None, save_interval: float = 1.0):
+        self.path = path
+        self.save_interval = save_interval
+        self.committed = self.load()
+        self._pending = deque()
+        self._done = set()
+        self._last_save = time.monotonic()
+
+    def load(self) -> int:
+        if not self.path or not os.path.exists(self.path):
+            return 0
+        with open(self.path) as f:
+            return json.load(f).get('offset', 0)
+
+    def track(self, offset: int):
+        self._pending.append(offset)
+
+    def done(self, offset: int):
+        self._done.add(offset)
+        while self._pending and self._pending[0] in self._done:
+            self.committed = self._pending.popleft()
+            self._done.discard(self.committed)
+
+        if time.monotonic() - self._last_save >= self.save_interval:
+            self.save()
+
+    def save(self):
+        self._last_save = time.monotonic()
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'offset': self.committed, 'saved_at': time.time()}, f)
+        os.replace(tmp_path, self.path)
+
+
+class DeadLetterLog:
+    """
+    Append-only JSONL file of posts a stage kept failing on, with the stage and
+    the last error, so they can be inspected and replayed. Without a path the
+    post is only logged.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path
+
+    def write(self, stage: str, post: dict, error: Exception, attempts: int):
+        entry = {
+            'stage': stage,
+            'offset': post.get('_offset'),
+            'error': repr(error),
+            'attempts': attempts,
+            'failed_at': time.time(),
+            'post': {key: value for key, value in post.items() if key != '_offset'}
+        }
+        if not self.path:
+            logger.error("Dead letter: %s", json.dumps(entry, default=str))
+            return
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(entry, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class IngestionPipeline:
+    """
+    Streams posts from a source through a chain of stages connected by bounded
+    asyncio queues. A full queue suspends the upstream producer, so a slow stage
+    throttles the whole pipeline back to the source instead of buffering unbounded.
+
+    A failing handler is retried up to `max_attempts` times with exponential
+    backoff (transient errors such as "database is locked" usually clear), and
+    a post that still fails is written to the dead-letter log before its offset
+    is marked done. If even that write fails the offset is never completed, so
+    the checkpoint stops short of it and the post is re-read after a restart.
+    """
+
+    def __init__(self, source, stages: list, checkpoint: OffsetCheckpoint = None, report_interval: float = 10.0,
+                 dead_letter: DeadLetterLog = None, max_attempts: int = 3, retry_backoff: float = 0.5):
+        if max_attempts < 1:
+            raise ValueError(f"max_attempts must be at least 1, got {max_attempts}")
+        self.source = source
+        self.stages = stages
+        self.checkpoint = checkpoint or OffsetCheckpoint()
+        self.dead_letter = dead_letter or DeadLetterLog()
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.report_interval = report_interval
+        self.queues = [asyncio.Queue(maxsize=stage.queue_size) for stage in stages]
+        self.stats = [StageStats(stage.name) for stage in stages]
+
+    def report(self) -> dict:
+        return {
+            'committed_offset': self.checkpoint.committed,
+            'stages': [stats.snapshot(queue.qsize()) for stats, queue in zip(self.stats, self.queues)]
+        }
+
+    async def _feed(self):
+        async for offset, post in self.source.stream():
+            post['_offset'] = offset
+            self.checkpoint.track(offset)
+            await self.queues[0].put(post)
+
+    async def _handle(self, stage: Stage, stats: StageStats, post: dict):
+        """Run the stage handler, retrying failures; returns (result, error of the last attempt)"""
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                return await stage.handler(post), None
+            except Exception as e:
+                if attempt == self.max_attempts:
+                    return None, e
+                stats.retries += 1
+                delay = self.retry_backoff * 2 ** (attempt - 1)
+                logger.info("Ingestion stage '%s' failed at offset %s (attempt %s/%s), retrying in %.2fs: %s",
+                            stage.name, post['_offset'], attempt, self.max_attempts, delay, e)
+                await asyncio.sleep(delay)
+
+    async def _worker(self, index: int):
+        stage = self.stages[index]
+        stats = self.stats[index]
+        queue = self.queues[index]
+        is_last = index == len(self.stages) - 1
+        latency = INGEST_STAGE_LATENCY.labels(stage=stage.name)
+
+        while True:
+            post = await queue.get()
+            try:
+                start = time.monotonic()
+                result, error = await self._handle(stage, stats, post)
+                if error is not None:
+                    stats.errors += 1
+                    logger.warning("Ingestion stage '%s' gave up at offset %s after %s attempts: %s",
+                                   stage.name, post['_offset'], self.max_attempts, error)
+                    try:
+                        self.dead_letter.write(stage.name, post, error, self.max_attempts)
+                    except OSError as e:
+                        logger.error("Could not dead-letter offset %s, leaving it uncommitted: %s",
+                                     post['_offset'], e)
+                        continue
+                    self.checkpoint.done(post['_offset'])
+                    continue
+
+                elapsed = time.monotonic() - start
+                stats.record(elapsed)
+                latency.observe(elapsed)
+                if result is None:
+                    stats.dropped += 1
+                    self.checkpoint.done(post['_offset'])
+                elif is_last:
+                    self.checkpoint.done(post['_offset'])
+                else:
+                    # Blocks while the next stage is saturated
+                    await self.queues[index + 1].put(result)
+            finally:
+                queue.task_done()
+
+    async def _reporter(self):
+        while True:
+            await asyncio.sleep(self.report_interval)
+            report = self.report()
+            logger.info("Ingestion committed offset: %s", report['committed_offset'])
+            for stage in report['stages']:
+                logger.info("  %s: %s posts/s, processed=%s, dropped=%s, errors=%s, retries=%s, queue=%s",
+                            stage['stage'], stage['posts_per_second'], stage['processed'],
+                            stage['dropped'], stage['errors'], stage['retries'], stage['queue_depth'])
+
+    async def run(self) -> dict:
+        """Run until the source is exhausted and every queued post is drained"""
+        workers = [
+            asyncio.create_task(self._worker(i))
+            for i, stage in enumerate(self.stages)
+            for _ in range(stage.workers)
+        ]
+        reporter = asyncio.create_task(self._reporter()) if self.report_interval else None
+
+        try:
+            await self._feed()
+            # Each stage hands a post downstream before marking it done, so
+            # joining the queues in order drains the pipeline front to back.
+            for queue in self.queues:
+                await queue.join()
+        finally:
+            for task in workers + ([reporter] if reporter else []):
+                task.cancel()
+            await asyncio.gather(*workers, *([reporter] if reporter else []), return_exceptions=True)
+            self.checkpoint.save()
+
+        return self.report()
@@ -0,0 +1,149 @@
+import asyncio
+import json
+import logging
+import sys
+
+logger = logging.getLogger(__name__)
+
+
+def parse_line(line: str):
+    """Turn one raw input line into a post dict, or None if it carries no text"""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError:
+        # Plain-text lines are accepted as the post body
+        return {'text': line}
+    if isinstance(record, dict) and isinstance(record.get('text'), str):
+        return record
+    return None
+
+
+class PostSource:
+    """
+    Base class for ingestion sources.
+
+    `stream()` is an async generator yielding `(offset, post)` pairs in
+    increasing offset order. Resumable sources accept `start_offset` and
+    continue right after the last checkpointed offset.
+    """
+    resumable = False
+
+    async def stream(self):
+        raise NotImplementedError
+        yield
+
+
+class JsonlFileSource(PostSource):
+    """Tails a JSONL file. Offsets are byte positions just past each line."""
+    resumable = True
+
+    def __init__(self, path: str, start_offset: int = 0, follow: bool = True, poll_interval: float = 0.5):
+        self.path = path
+        self.start_offset = start_offset
+        self.follow = follow
+        self.poll_interval = poll_interval
+
+    async def stream(self):
+        with open(self.path, 'rb') as f:
+            f.seek(self.start_offset)
+            position = self.start_offset
+            while True:
+                raw = f.readline()
+                if not raw or not raw.endswith(b'\n'):
+                    if not self.follow:
+                        # Last line without a trailing newline is still a full record
+                        if raw:
+                            post = parse_line(raw.decode('utf-8', errors='replace'))
+                            if post is not None:
+                                yield position + len(raw), post
+                        return
+                    # Partial or no line yet: rewind and wait for the writer
+                    f.seek(position)
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+
+                position += len(raw)
+                post = parse_line(raw.decode('utf-8', errors='replace'))
+                if post is not None:
+                    yield position, post
+
+
+class StdinSource(PostSource):
+    """Reads newline-delimited posts from stdin. Offsets are line numbers."""
+
+    async def stream(self):
+        loop = asyncio.get_running_loop()
+        offset = 0
+        while True:
+            line = await loop.run_in_executor(None, sys.stdin.readline)
+            if not line:
+                return
+            offset += 1
+            post = parse_line(line)
+            if post is not None:
+                yield offset, post
+
+
+class QueueSource(PostSource):
+    """
+    In-process stand-in for a message queue. Producers call `publish()`,
+    which blocks once `maxsize` posts are waiting, and `close()` when done.
+    """
+    _CLOSED = object()
+
+    def __init__(self, maxsize: int = 1000):
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.offset = 0
+
+    async def publish(self, post: dict):
+        await self.queue.put(post)
+
+    async def close(self):
+        await self.queue.put(self._CLOSED)
+
+    async def stream(self):
+        while True:
+            post = await self.queue.get()
+            if post is self._CLOSED:
+                return
+            self.offset += 1
+            yield self.offset, post
+
+
+class SocketSource(QueueSource):
+    """
+    Accepts newline-delimited posts over a local TCP socket. Connections
+    stop being read while the internal queue is full, so backpressure
+    propagates to the sender through TCP flow control.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 9000, maxsize: int = 1000):
+        super().__init__(maxsize=maxsize)
+        self.host = host
+        self.port = port
+        self.server = None
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                post = parse_line(line.decode('utf-8', errors='replace'))
+                if post is not None:
+                    await self.publish(post)
+        finally:
+            writer.close()
+
+    async def stream(self):
+        self.server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        logger.info("Ingestion socket listening on %s:%s", self.host, self.port)
+        try:
+            async for item in super().stream():
+                yield item
+        finally:
+            self.server.close()
+            await self.server.wait_closed()
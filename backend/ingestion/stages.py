@@ -0,0 +1,52 @@
+import asyncio
+from datetime import datetime
+from ingestion.pipeline import Stage
+from models.text_analysis import AnalyzedText
+
+
+def build_stages(medical_classifier, fake_detector, evidence_service, db,
+                 workers: dict = None, queue_size: int = 100) -> list:
+    """
+    Build the classify -> detect -> evidence -> store stages mirroring `/analyze`.
+    `workers` maps stage name to worker count; unspecified stages get one worker.
+    """
+    workers = workers or {}
+
+    async def classify(post: dict):
+        post['doc'] = AnalyzedText(post['text'])
+        # Model inference is CPU-bound; keep it off the event loop
+        is_medical, medical_conf = await asyncio.to_thread(medical_classifier.predict, post['doc'])
+        if not is_medical:
+            return None
+        post['is_medical'] = is_medical
+        post['medical_confidence'] = medical_conf
+        return post
+
+    async def detect(post: dict):
+        post['is_fake'], post['fake_confidence'] = fake_detector.predict(post['doc'])
+        return post
+
+    async def evidence(post: dict):
+        post['evidence'], post['sources'] = await evidence_service.get_evidence(post['doc'])
+        return post
+
+    async def store(post: dict):
+        await asyncio.to_thread(db.store_result, {
+            'text': post['text'],
+            'is_medical': post['is_medical'],
+            'medical_confidence': post['medical_confidence'],
+            'is_fake': post['is_fake'],
+            'fake_confidence': post['fake_confidence'],
+            'timestamp': post.get('timestamp') or datetime.now().isoformat()
+        })
+        return post
+
+    return [
+        Stage(name, handler, workers=workers.get(name, 1), queue_size=queue_size)
+        for name, handler in (
+            ('classify', classify),
+            ('detect', detect),
+            ('evidence', evidence),
+            ('store', store)
+        )
+    ]
@@ -0,0 +1,157 @@
+import asyncio
+import json
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+from database.db import Database
+
+logger = logging.getLogger(__name__)
+
+RECENT_WINDOW = timedelta(days=1)
+
+
+class StatsAggregate:
+    """
+    In-memory running totals behind `/stats`, updated as results are stored
+    instead of recomputed with table scans. The last-24h count is kept in
+    per-minute buckets so it can expire without touching the database.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.medical = 0
+        self.fake = 0
+        self.archived = 0
+        self._recent = Counter()
+
+    def load(self, stats: dict, recent_buckets: dict):
+        """Replace the running totals with a fresh reading from the database"""
+        self.total = stats['total_analyses']
+        self.medical = stats['medical_posts']
+        self.fake = stats['fake_posts']
+        self.archived = stats.get('archived_analyses', 0)
+        self._recent = Counter(recent_buckets)
+
+    def record(self, result: dict):
+        self.total += 1
+        self.medical += bool(result['is_medical'])
+        self.fake += bool(result['is_fake'])
+        self._recent[result['timestamp'][:16]] += 1
+
+    def _expire(self):
+        cutoff = (datetime.now() - RECENT_WINDOW).isoformat()[:16]
+        for minute in [minute for minute in self._recent if minute <= cutoff]:
+            del self._recent[minute]
+
+    def snapshot(self) -> dict:
+        """Same shape as `Database.get_stats`"""
+        self._expire()
+        return {
+            'total_analyses': self.total,
+            'archived_analyses': self.archived,
+            'medical_posts': self.medical,
+            'fake_posts': self.fake,
+            'recent_analyses': sum(self._recent.values()),
+            'medical_percentage': round((self.medical / max(self.total, 1)) * 100, 1),
+            'fake_percentage': round((self.fake / max(self.medical, 1)) * 100, 1)
+        }
+
+
+class StatsBroadcaster:
+    """
+    Fans one StatsAggregate out to any number of stream subscribers. Changes
+    are coalesced and published at most once per `interval` as a delta of the
+    fields that moved; a subscriber first receives the full snapshot, and gets
+    it again if it falls so far behind that its queue overflows. The database
+    is re-read every `resync_interval` to pick up writes from other processes
+    (the ingestion CLI) and retention.
+    """
+
+    def __init__(self, db: Database, interval: float = 1.0, resync_interval: float = 300.0,
+                 keepalive: float = 15.0, max_pending: int = 32):
+        self.db = db
+        self.aggregate = StatsAggregate()
+        self.interval = interval
+        self.resync_interval = resync_interval
+        self.keepalive = keepalive
+        self.max_pending = max_pending
+        self._subscribers = set()
+        self._published = {}
+        self._changed = asyncio.Event()
+        self._tasks = []
+
+    async def start(self):
+        await self._resync()
+        self._published = self.aggregate.snapshot()
+        self._tasks = [asyncio.create_task(self._publish_loop()), asyncio.create_task(self._resync_loop())]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def snapshot(self) -> dict:
+        return self.aggregate.snapshot()
+
+    def record(self, result: dict):
+        """Count a stored result; subscribers hear about it on the next publish"""
+        self.aggregate.record(result)
+        self._changed.set()
+
+    async def _resync(self):
+        cutoff = (datetime.now() - RECENT_WINDOW).isoformat()
+        stats, buckets = await asyncio.to_thread(
+            lambda: (self.db.get_stats(), self.db.get_recent_buckets(cutoff)))
+        self.aggregate.load(stats, buckets)
+        self._changed.set()
+
+    async def _resync_loop(self):
+        while True:
+            await asyncio.sleep(self.resync_interval)
+            try:
+                await self._resync()
+            except Exception as e:
+                logger.warning("Stats resync failed: %s", e)
+
+    async def _publish_loop(self):
+        while True:
+            # The 24h window also moves with no new writes, so wake up on the keepalive too
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=self.keepalive)
+            except asyncio.TimeoutError:
+                pass
+            self._changed.clear()
+            snapshot = self.aggregate.snapshot()
+            delta = {key: value for key, value in snapshot.items() if self._published.get(key) != value}
+            self._published = snapshot
+            if delta:
+                self._broadcast(("delta", delta))
+            await asyncio.sleep(self.interval)
+
+    def _broadcast(self, event: tuple):
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # A consumer this far behind cannot apply deltas; start it over from a snapshot
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(("snapshot", self._published))
+
+    async def events(self):
+        """Server-sent event stream for one subscriber"""
+        queue = asyncio.Queue(maxsize=self.max_pending)
+        queue.put_nowait(("snapshot", self._published or self.aggregate.snapshot()))
+        self._subscribers.add(queue)
+        try:
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), timeout=self.keepalive)
+                except asyncio.TimeoutError:
+                    # Comment line: keeps proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        finally:
+            self._subscribers.discard(queue)
@@ -0,0 +1,30 @@
+import logging
+import random
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Passes every WARNING-and-above record but only a random `sample_rate`
+    fraction of lower-level records, so per-request debug/info logging stays
+    cheap under load.
+    """
+
+    def __init__(self, sample_rate: float = 1.0):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.sample_rate >= 1.0:
+            return True
+        return random.random() < self.sample_rate
+
+
+def configure_logging(level: str = "INFO", sample_rate: float = 1.0):
+    """Configure root logging once at process start"""
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    handler.addFilter(SamplingFilter(sample_rate))
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(level.upper())
@@ -0,0 +1,211 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Upper bounds in seconds; covers sub-millisecond lexical checks up to upstream timeouts
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_registry = []
+
+
+def _format_labels(labelnames: tuple, values: tuple, extra: dict = None) -> str:
+    pairs = list(zip(labelnames, values)) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _samples(self, key: tuple, child) -> list:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in list(self._children.items()):
+            lines.extend(self._samples(key, child))
+        return "\n".join(lines)
+
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0, **labels):
+        self.labels(**labels).inc(amount)
+
+    def _samples(self, key, child):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {child.value}"]
+
+
+class _GaugeChild:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def _samples(self, key, child):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {child.value}"]
+
+
+class _HistogramChild:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by linear interpolation within its bucket"""
+        with self._lock:
+            counts = list(self.counts)
+        total = sum(counts)
+        if not total:
+            return 0.0
+
+        rank = q * total
+        cumulative = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets, counts):
+            if count and cumulative + count >= rank:
+                return lower + (bound - lower) * (rank - cumulative) / count
+            cumulative += count
+            lower = bound
+        # Rank falls in the +Inf bucket; the largest finite bound is the best estimate
+        return self.buckets[-1]
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def summary(self, quantiles: tuple = (0.5, 0.95, 0.99)) -> dict:
+        """Observation count and estimated quantiles for every label combination"""
+        result = {}
+        for key, child in list(self._children.items()):
+            name = ",".join(f"{k}={v}" for k, v in zip(self.labelnames, key)) or self.name
+            result[name] = {'count': sum(child.counts)}
+            for q in quantiles:
+                result[name][f"p{int(q * 100)}"] = child.quantile(q)
+        return result
+
+    def _samples(self, key, child):
+        with child._lock:
+            counts = list(child.counts)
+            total = child.sum
+
+        samples = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            samples.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, {'le': le})} {cumulative}")
+        samples.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+        samples.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return samples
+
+
+def render_prometheus() -> str:
+    """Render every registered metric in the Prometheus text exposition format"""
+    return "\n".join(metric.render() for metric in _registry) + "\n"
+
+
+# -------------------------------
+# Application metrics
+# -------------------------------
+REQUEST_LATENCY = Histogram(
+    "analyze_request_duration_seconds", "End-to-end /analyze latency.", ["outcome"])
+STAGE_LATENCY = Histogram(
+    "analyze_stage_duration_seconds", "Latency of each /analyze pipeline stage.", ["stage"])
+UPSTREAM_LATENCY = Histogram(
+    "upstream_request_duration_seconds", "Latency of upstream evidence HTTP calls.", ["service", "call"])
+UPSTREAM_ERRORS = Counter(
+    "upstream_request_errors_total", "Upstream evidence HTTP calls that failed or returned non-200.", ["service", "call"])
+EVIDENCE_EMBEDDING_CACHE = Counter(
+    "evidence_embedding_cache_total", "Evidence passage embedding cache lookups.", ["result"])
+DB_LATENCY = Histogram(
+    "db_operation_duration_seconds", "Latency of SQLite operations.", ["operation"])
+ARCHIVED_ROWS = Counter(
+    "analyses_archived_total", "Analyses moved from the hot table into archive shards.", ["period"])
+ADMISSION_IN_FLIGHT = Gauge(
+    "admission_in_flight", "Analyses currently holding an admission slot.")
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "admission_queue_depth", "Requests waiting for an admission slot.", ["priority"])
+ADMISSION_SHED = Counter(
+    "admission_shed_total", "Requests rejected by admission control.", ["priority", "reason"])
+ADMISSION_WAIT = Histogram(
+    "admission_wait_duration_seconds", "Time spent waiting for an admission slot.", ["priority"])
+RESPONSE_TIER = Counter(
+    "analyze_tier_total", "Analyses served per degradation tier.", ["tier"])
+INGEST_STAGE_LATENCY = Histogram(
+    "ingest_stage_duration_seconds", "Latency of each streaming ingestion stage.", ["stage"])
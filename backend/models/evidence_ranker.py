@@ -0,0 +1,73 @@
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+import numpy as np
+from metrics import EVIDENCE_EMBEDDING_CACHE
+
+# One candidate piece of evidence: where it came from, the upstream
+# identifier (Wikipedia title, PubMed id) and the text that gets ranked
+Passage = namedtuple("Passage", ["source", "ref", "text"])
+
+
+class EvidenceRanker:
+    """
+    Orders candidate evidence passages by embedding similarity to the claim.
+    Passage embeddings are cached by content hash, so an article that keeps
+    coming back from upstream is only ever encoded once.
+    """
+
+    def __init__(self, model, cache_size: int = 4096, batch_size: int = 64):
+        self.model = model
+        self.cache_size = cache_size
+        self.batch_size = batch_size
+        self._cache = OrderedDict()
+        # rank() runs on worker threads
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(text: str) -> str:
+        return hashlib.sha1(text.encode()).hexdigest()
+
+    def _cached(self, keys: list) -> dict:
+        found = {}
+        with self._lock:
+            for key in keys:
+                vector = self._cache.get(key)
+                if vector is not None:
+                    self._cache.move_to_end(key)
+                    found[key] = vector
+        return found
+
+    def _store(self, entries: dict):
+        with self._lock:
+            self._cache.update(entries)
+            for key in entries:
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def rank(self, claim: str, passages: list, k: int = 3) -> list:
+        """
+        Returns up to k (passage, score) pairs, most similar to `claim` first.
+        The claim and every uncached passage are encoded in a single batch.
+        """
+        if not passages:
+            return []
+        keys = [self._key(p.text) for p in passages]
+        vectors = self._cached(keys)
+        misses = list(dict.fromkeys(
+            (key, p.text) for key, p in zip(keys, passages) if key not in vectors
+        ))
+        EVIDENCE_EMBEDDING_CACHE.inc(len(passages) - len(misses), result="hit")
+        EVIDENCE_EMBEDDING_CACHE.inc(len(misses), result="miss")
+
+        # The claim is encoded alongside the misses but never cached; claims rarely repeat
+        encoded = self.model.encode([claim] + [text for _, text in misses], batch_size=self.batch_size,
+                                    convert_to_numpy=True, normalize_embeddings=True)
+        fresh = {key: vector for (key, _), vector in zip(misses, encoded[1:])}
+        self._store(fresh)
+        vectors.update(fresh)
+
+        scores = np.stack([vectors[key] for key in keys]) @ encoded[0]
+        order = np.argsort(-scores, kind="stable")[:k]
+        return [(passages[i], float(scores[i])) for i in order]
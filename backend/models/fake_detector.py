@@ -1,4 +1,5 @@
 from services.pubmed_service import PubMedService
+from models.text_analysis import AnalyzedText
 class FakeDetector:
     async def is_medical_based_on_pubmed(text):
         evidence = await PubMedService.get_evidence(text)
@@ -17,9 +18,9 @@ class FakeDetector:
             'according to', 'medical journal', 'fda approved', 'cdc recommends',
             'who guidelines', 'evidence-based', 'randomized controlled'
         ]
-    def predict(self, text: str) -> tuple[bool, float]:
-        """Predict if medical text is fake"""
-        text_lower = text.lower()
+    def predict(self, text) -> tuple[bool, float]:
+        """Predict if medical text (raw or an AnalyzedText) is fake"""
+        text_lower = AnalyzedText.of(text).lower
 
         # Count fake indicators
         fake_score = sum(1 for indicator in self.fake_indicators if indicator in text_lower)
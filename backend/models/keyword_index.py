@@ -0,0 +1,192 @@
+import hashlib
+import numpy as np
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest scores along the last axis, best first"""
+    k = min(k, scores.shape[-1])
+    part = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+    order = np.argsort(-np.take_along_axis(scores, part, axis=-1), axis=-1)
+    return np.take_along_axis(part, order, axis=-1)
+
+
+def vocabulary_fingerprint(terms: list, model_name: str, **build_options) -> str:
+    """
+    Identifies the encoder, vocabulary and build options (e.g. `n_lists`) an
+    index was built from, so changing any of them forces a rebuild.
+    """
+    digest = hashlib.sha1(model_name.encode())
+    for term in terms:
+        digest.update(b"\0" + term.encode())
+    for name, value in sorted(build_options.items()):
+        digest.update(f"\0{name}={value!r}".encode())
+    return digest.hexdigest()
+
+
+class KeywordIndex:
+    """
+    Cosine-similarity lookup from query vectors to the nearest vocabulary
+    terms. Vectors are L2-normalised on the way in, so inner product is cosine.
+    """
+    kind = None
+
+    def __init__(self, terms: list, vectors: np.ndarray, fingerprint: str = ""):
+        self.terms = list(terms)
+        self.vectors = _normalize(vectors)
+        self.fingerprint = fingerprint
+
+    def __len__(self):
+        return len(self.terms)
+
+    def search(self, queries: np.ndarray, k: int = 1) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (scores, ids), both shaped (len(queries), k), best match first.
+        Missing neighbours are padded with score -inf and id -1.
+        """
+        raise NotImplementedError
+
+    def _arrays(self) -> dict:
+        return {}
+
+    def save(self, path: str):
+        np.savez(
+            path,
+            kind=np.array(self.kind),
+            terms=np.array(self.terms, dtype=str),
+            vectors=self.vectors,
+            fingerprint=np.array(self.fingerprint),
+            **self._arrays()
+        )
+
+
+class ExactIndex(KeywordIndex):
+    """Brute-force matrix product over the whole vocabulary, chunked to bound memory"""
+    kind = "exact"
+
+    def __init__(self, terms: list, vectors: np.ndarray, fingerprint: str = "", max_scores: int = 1 << 24):
+        super().__init__(terms, vectors, fingerprint)
+        self.max_scores = max_scores
+
+    def search(self, queries: np.ndarray, k: int = 1) -> tuple[np.ndarray, np.ndarray]:
+        queries = _normalize(np.atleast_2d(queries))
+        k = min(k, len(self))
+        # Cap the (queries x vocabulary) score matrix at max_scores floats
+        rows = max(1, self.max_scores // max(len(self), 1))
+
+        all_scores, all_ids = [], []
+        for start in range(0, len(queries), rows):
+            scores = queries[start:start + rows] @ self.vectors.T
+            ids = _top_k(scores, k)
+            all_scores.append(np.take_along_axis(scores, ids, axis=-1))
+            all_ids.append(ids)
+        return np.concatenate(all_scores), np.concatenate(all_ids)
+
+
+class IVFIndex(KeywordIndex):
+    """
+    Inverted-file index: vocabulary vectors are clustered with spherical
+    k-means, and a query is only scored against the members of its `n_probe`
+    closest clusters. Members are stored contiguously per cluster so each probe
+    is a slice rather than a gather.
+    """
+    kind = "ivf"
+
+    def __init__(self, terms: list, vectors: np.ndarray, fingerprint: str = "",
+                 n_lists: int = None, n_probe: int = 8, iterations: int = 10, seed: int = 0,
+                 centroids: np.ndarray = None, order: np.ndarray = None, offsets: np.ndarray = None):
+        super().__init__(terms, vectors, fingerprint)
+        self.n_probe = n_probe
+        if centroids is None:
+            n_lists = n_lists or max(1, int(np.sqrt(len(self))))
+            centroids, assignments = self._train(n_lists, iterations, seed)
+            order = np.argsort(assignments, kind="stable")
+            offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=n_lists))])
+        self.centroids = centroids
+        self.order = order
+        self.offsets = offsets
+        self.sorted_vectors = self.vectors[order]
+
+    def _assign(self, vectors: np.ndarray, centroids: np.ndarray, chunk: int = 8192) -> np.ndarray:
+        return np.concatenate([
+            np.argmax(vectors[i:i + chunk] @ centroids.T, axis=1)
+            for i in range(0, len(vectors), chunk)
+        ])
+
+    def _train(self, n_lists: int, iterations: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+        rng = np.random.default_rng(seed)
+        n_lists = min(n_lists, len(self))
+        # Train on a sample; 256 points per list is plenty for stable centroids
+        sample_size = min(len(self), n_lists * 256)
+        sample = self.vectors[rng.choice(len(self), sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignments = self._assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            counts = np.bincount(assignments, minlength=n_lists)
+            empty = counts == 0
+            # Reseed empty clusters from random points so every list stays in use
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            centroids = _normalize(sums)
+
+        return centroids, self._assign(self.vectors, centroids)
+
+    def search(self, queries: np.ndarray, k: int = 1) -> tuple[np.ndarray, np.ndarray]:
+        queries = _normalize(np.atleast_2d(queries))
+        n_probe = min(self.n_probe, len(self.centroids))
+        probes = _top_k(queries @ self.centroids.T, n_probe)
+
+        # Each probed list contributes up to k candidates per query, in the
+        # column block of the probe slot that selected it
+        candidate_scores = np.full((len(queries), n_probe * k), -np.inf, dtype=np.float32)
+        candidate_ids = np.full((len(queries), n_probe * k), -1, dtype=np.int64)
+
+        # List-major: every query probing a list is scored against it in one product
+        for cluster in np.unique(probes):
+            start, end = self.offsets[cluster], self.offsets[cluster + 1]
+            if start == end:
+                continue
+            rows, slots = np.nonzero(probes == cluster)
+            scores = queries[rows] @ self.sorted_vectors[start:end].T
+            best = _top_k(scores, k)
+            columns = slots[:, None] * k + np.arange(best.shape[1])
+            candidate_scores[rows[:, None], columns] = np.take_along_axis(scores, best, axis=-1)
+            candidate_ids[rows[:, None], columns] = self.order[start + best]
+
+        final = _top_k(candidate_scores, k)
+        return (np.take_along_axis(candidate_scores, final, axis=-1),
+                np.take_along_axis(candidate_ids, final, axis=-1))
+
+    def _arrays(self) -> dict:
+        return {
+            'centroids': self.centroids,
+            'order': self.order,
+            'offsets': self.offsets,
+            'n_probe': np.array(self.n_probe)
+        }
+
+
+INDEX_TYPES = {ExactIndex.kind: ExactIndex, IVFIndex.kind: IVFIndex}
+
+
+def build_index(kind: str, terms: list, vectors: np.ndarray, fingerprint: str = "", **options) -> KeywordIndex:
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"Unknown keyword index type: {kind}")
+    return INDEX_TYPES[kind](terms, vectors, fingerprint, **options)
+
+
+def load_index(path: str) -> KeywordIndex:
+    with np.load(path) as data:
+        kind = str(data['kind'])
+        common = ([str(term) for term in data['terms']], data['vectors'], str(data['fingerprint']))
+        if kind == IVFIndex.kind:
+            return IVFIndex(*common, n_probe=int(data['n_probe']), centroids=data['centroids'],
+                            order=data['order'], offsets=data['offsets'])
+        return build_index(kind, *common)
@@ -1,7 +1,10 @@
-from sentence_transformers import SentenceTransformer, util
-import torch
+import os
+import numpy as np
+from sentence_transformers import SentenceTransformer
 import nltk
-from nltk.tokenize import sent_tokenize
+from deadline import Deadline, DeadlineExceeded
+from models.keyword_index import build_index, load_index, vocabulary_fingerprint
+from models.text_analysis import AnalyzedText
 
 # Download the 'punkt' tokenizer data for NLTK if you haven't already
 try:
@@ -22,12 +25,25 @@ except LookupError:
 # --- END ADDITION ---
 
 class MedicalClassifier:
-    def __init__(self, model_name: str = 'all-MiniLM-L6-v2'):
+    def __init__(self, model_name: str = 'all-MiniLM-L6-v2', vocabulary_path: str = None,
+                 index_path: str = None, index_type: str = 'exact', encode_batch_size: int = 64,
+                 **index_options):
         """
         Initializes the MedicalClassifier with a Sentence Transformer model.
         Args:
             model_name (str): The name of the pre-trained model to use.
+            vocabulary_path (str): Optional file of extra medical terms, one per line,
+                                   added to the built-in keywords.
+            index_path (str): Optional .npz file the keyword index is loaded from and
+                              saved to, so a large vocabulary is only encoded once.
+            index_type (str): 'exact' for brute-force search, 'ivf' for the clustered
+                              approximate index suited to very large vocabularies.
+            encode_batch_size (int): Words encoded per encoder call in `extract`; the
+                                     request deadline is checked between calls.
+            **index_options: Passed to the index constructor (e.g. n_lists, n_probe).
         """
+        self.model_name = model_name
+        self.encode_batch_size = encode_batch_size
         print(f"Loading Sentence Transformer model: {model_name}...")
         self.model = SentenceTransformer(model_name)
         print("Model loaded successfully.")
@@ -42,58 +58,126 @@ class MedicalClassifier:
             "condition", "disorder", "pathology", "anatomy", "physiology"
             # Expanded for better coverage
         ]
-        self.medical_vectors = self.model.encode(self.medical_keywords, convert_to_tensor=True)
-        print(f"Encoded {len(self.medical_keywords)} medical keywords.")
+        if vocabulary_path:
+            self.medical_keywords += self._read_vocabulary(vocabulary_path)
+        # Duplicates would only waste index space
+        self.medical_keywords = list(dict.fromkeys(self.medical_keywords))
+        self.medical_keyword_set = set(self.medical_keywords)
+        self.keyword_index = self._load_or_build_index(index_path, index_type, index_options)
+        print(f"Indexed {len(self.keyword_index)} medical keywords ({self.keyword_index.kind}).")
 
-    def extract(self, text: str, similarity_threshold: float = 0.6) -> dict:
+    @staticmethod
+    def _read_vocabulary(path: str) -> list:
+        with open(path, encoding="utf-8") as f:
+            return [line.strip().lower() for line in f if line.strip() and not line.startswith("#")]
+
+    def _load_or_build_index(self, index_path: str, index_type: str, index_options: dict):
+        """
+        Reuse a saved index when it was built from the same model, vocabulary and
+        build options; otherwise encode the vocabulary and build (and save) a fresh one.
+        """
+        # n_probe only affects queries and can change on a saved index; everything else shapes the build
+        build_options = {name: value for name, value in index_options.items() if name != 'n_probe'}
+        fingerprint = vocabulary_fingerprint(self.medical_keywords, self.model_name, **build_options)
+        if index_path and os.path.exists(index_path):
+            index = load_index(index_path)
+            if index.fingerprint == fingerprint and index.kind == index_type:
+                if 'n_probe' in index_options:
+                    index.n_probe = index_options['n_probe']
+                return index
+            print(f"Keyword index at {index_path} is stale; rebuilding.")
+
+        vectors = self.model.encode(self.medical_keywords, batch_size=256,
+                                    convert_to_numpy=True, normalize_embeddings=True)
+        index = build_index(index_type, self.medical_keywords, vectors, fingerprint, **index_options)
+        if index_path:
+            index.save(index_path)
+        return index
+
+    def extract(self, text, similarity_threshold: float = 0.6, deadline: Deadline = None) -> dict:
         """
         Extracts medical-related words from a given text based on semantic similarity.
         Args:
-            text (str): The input text to analyze.
+            text (str | AnalyzedText): The input text to analyze, or its preprocessed document.
             similarity_threshold (float): The minimum cosine similarity score to consider a word as medical-related.
+            deadline (Deadline): Optional request deadline. Words are encoded in batches of
+                                 `encode_batch_size` and the deadline is checked before each,
+                                 so the call raises DeadlineExceeded within one batch of it
+                                 passing instead of running on after the caller has given up.
         Returns:
             dict: A dictionary mapping identified medical words to their highest similarity score.
         """
-        if not text:
+        doc = AnalyzedText.of(text)
+        if not doc.text:
             return {}
 
-        # Tokenize and encode each word in the text.
-        # We split on spaces for simplicity; a more advanced tokenizer could be used.
-        words = text.lower().split()
+        # Encode each distinct whitespace token once; repeats share a score.
+        words = list(dict.fromkeys(token.lower for token in doc.tokens))
         if not words:
             return {}
 
-        word_vectors = self.model.encode(words, convert_to_tensor=True)
+        batches = []
+        for start in range(0, len(words), self.encode_batch_size):
+            if deadline is not None and deadline.expired():
+                raise DeadlineExceeded(f"Deadline passed after encoding {start} of {len(words)} words")
+            batches.append(self.model.encode(words[start:start + self.encode_batch_size],
+                                             convert_to_numpy=True, normalize_embeddings=True))
+        word_vectors = np.concatenate(batches)
 
-        extracted_keywords = {}
-        for i, word in enumerate(words):
-            # Calculate cosine similarity between the word's vector and all medical keyword vectors.
-            cosine_scores = util.pytorch_cos_sim(word_vectors[i], self.medical_vectors)[0]
+        # Highest cosine similarity of each word to any medical keyword, in one batched lookup.
+        scores, _ = self.keyword_index.search(word_vectors, k=1)
 
-            # Find the highest similarity score for the current word.
-            max_similarity = torch.max(cosine_scores).item()
+        return {
+            word: float(score)
+            for word, score in zip(words, scores[:, 0])
+            if score >= similarity_threshold
+        }
 
-            if max_similarity >= similarity_threshold:
-                extracted_keywords[word] = max_similarity
+    def extract_batch(self, texts: list, similarity_threshold: float = 0.6) -> list:
+        """
+        `extract` for many texts at once: the distinct words of the whole batch
+        go through the encoder and the keyword index in a single call each.
+        Args:
+            texts (list[str | AnalyzedText]): The input texts or their preprocessed documents.
+            similarity_threshold (float): The minimum cosine similarity score to consider a word as medical-related.
+        Returns:
+            list[dict]: One word-to-score mapping per input text, in order.
+        """
+        docs = [AnalyzedText.of(text) for text in texts]
+        doc_words = [list(dict.fromkeys(token.lower for token in doc.tokens)) for doc in docs]
+        words = list(dict.fromkeys(word for words_in_doc in doc_words for word in words_in_doc))
+        if not words:
+            return [{} for _ in docs]
 
-        return extracted_keywords
+        word_vectors = self.model.encode(words, batch_size=256, convert_to_numpy=True, normalize_embeddings=True)
+        scores, _ = self.keyword_index.search(word_vectors, k=1)
+        medical_scores = {
+            word: float(score) for word, score in zip(words, scores[:, 0])
+            if score >= similarity_threshold
+        }
+        return [
+            {word: medical_scores[word] for word in words_in_doc if word in medical_scores}
+            for words_in_doc in doc_words
+        ]
 
-    def predict(self, text: str, similarity_threshold: float = 0.6) -> tuple[bool, float]:
+    def predict(self, text, similarity_threshold: float = 0.6,
+                deadline: Deadline = None) -> tuple[bool, float]:
         """
         Predicts whether the given text contains any medical-related content and a confidence score.
         Confidence is based on the average similarity of identified medical keywords.
 
         Args:
-            text (str): The input text to analyze.
+            text (str | AnalyzedText): The input text to analyze, or its preprocessed document.
             similarity_threshold (float): The minimum cosine similarity score
                                           to consider a word as medical-related.
+            deadline (Deadline): Optional request deadline, passed through to `extract`.
         Returns:
             tuple[bool, float]: (is_medical, medical_confidence)
                                 - is_medical: True if medical keywords are identified, False otherwise.
                                 - medical_confidence: Average similarity score of identified medical keywords (0.0 to 1.0).
                                                      Returns 0.0 if no medical keywords are found.
         """
-        extracted_terms = self.extract(text, similarity_threshold)
+        extracted_terms = self.extract(text, similarity_threshold, deadline)
         is_medical = bool(extracted_terms)
         medical_confidence = 0.0
 
@@ -105,7 +189,34 @@ class MedicalClassifier:
 
         return is_medical, medical_confidence
 
-    def predict_by_sentence(self, text: str, similarity_threshold: float = 0.6,
+    def predict_batch(self, texts: list, similarity_threshold: float = 0.6) -> list:
+        """
+        `predict` for many texts with one batched encoder pass.
+        Returns:
+            list[tuple[bool, float]]: (is_medical, medical_confidence) per input text, in order.
+        """
+        return [
+            (bool(extracted), sum(extracted.values()) / len(extracted) if extracted else 0.0)
+            for extracted in self.extract_batch(texts, similarity_threshold)
+        ]
+
+    def predict_lexical(self, text) -> tuple[bool, float]:
+        """
+        Keyword-only fallback that skips the encoder entirely. Used when the
+        request deadline leaves no room for semantic classification.
+
+        Args:
+            text (str | AnalyzedText): The input text to analyze, or its preprocessed document.
+        Returns:
+            tuple[bool, float]: (is_medical, medical_confidence), where confidence grows
+                                with the number of exact keyword matches.
+        """
+        matches = AnalyzedText.of(text).word_set & self.medical_keyword_set
+        if not matches:
+            return False, 0.0
+        return True, min(0.9, 0.5 + 0.1 * len(matches))
+
+    def predict_by_sentence(self, text, similarity_threshold: float = 0.6,
                             medical_sentence_ratio_threshold: float = 0.3) -> dict:
         """
         Analyzes a text sentence by sentence to predict whether it contains medical content.
@@ -126,13 +237,14 @@ class MedicalClassifier:
                                         including the sentence text, whether it's medical,
                                         and identified keywords.
         """
-        if not text:
+        doc = AnalyzedText.of(text)
+        if not doc.text:
             return {
                 'is_medical_text': False,
                 'sentence_details': []
             }
 
-        sentences = sent_tokenize(text)
+        sentences = doc.sentences
         sentence_details = []
         medical_sentence_count = 0
 
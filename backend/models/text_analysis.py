@@ -0,0 +1,69 @@
+import re
+from collections import namedtuple
+from functools import cached_property
+from nltk.tokenize import sent_tokenize
+
+Token = namedtuple("Token", ["text", "lower", "start", "end"])
+
+# Vocabulary the PubMed search is built from
+MEDICAL_SEARCH_TERMS = frozenset({
+    "cancer", "diabetes", "covid", "vaccine", "treatment", "therapy", "drug", "disease"
+})
+
+# Acronyms first so "COVID-19" is not split by the capitalised-phrase branch
+_CANDIDATE_TERM_PATTERN = re.compile(
+    r'\b(?:COVID-19|HIV|DNA|RNA|AIDS)\b|\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b'
+)
+_TOKEN_PATTERN = re.compile(r'\S+')
+_WORD_PATTERN = re.compile(r'\w+')
+
+
+class AnalyzedText:
+    """
+    Per-request preprocessing shared by every pipeline stage. Each view is
+    computed at most once, on first use, so stages that need the same
+    normalisation no longer redo it.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+
+    @classmethod
+    def of(cls, text_or_doc) -> "AnalyzedText":
+        """Accept either raw text or an existing document"""
+        return text_or_doc if isinstance(text_or_doc, cls) else cls(text_or_doc)
+
+    @cached_property
+    def lower(self) -> str:
+        return self.text.lower()
+
+    @cached_property
+    def tokens(self) -> list:
+        """Whitespace-delimited tokens with character offsets into `text`"""
+        return [
+            Token(m.group(), m.group().lower(), m.start(), m.end())
+            for m in _TOKEN_PATTERN.finditer(self.text)
+        ]
+
+    @cached_property
+    def words(self) -> list:
+        """Lowercased alphanumeric words, i.e. tokens with punctuation stripped"""
+        return _WORD_PATTERN.findall(self.lower)
+
+    @cached_property
+    def word_set(self) -> frozenset:
+        return frozenset(self.words)
+
+    @cached_property
+    def sentences(self) -> list:
+        return sent_tokenize(self.text)
+
+    @cached_property
+    def candidate_terms(self) -> list:
+        """Capitalised phrases and well-known acronyms, unique, in order of appearance"""
+        return list(dict.fromkeys(_CANDIDATE_TERM_PATTERN.findall(self.text)))
+
+    @cached_property
+    def medical_terms(self) -> list:
+        """Words from the medical search vocabulary, unique, in order of appearance"""
+        return list(dict.fromkeys(w for w in self.words if w in MEDICAL_SEARCH_TERMS))
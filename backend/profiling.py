@@ -0,0 +1,190 @@
+import asyncio
+import contextvars
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from datetime import datetime
+
+_active_profile = contextvars.ContextVar("active_profile", default=None)
+
+
+def _collapse(frame) -> str:
+    """Render a frame chain root-first in the collapsed-stack (flamegraph) format"""
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+
+def _render(stacks: Counter) -> str:
+    return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common()) + "\n"
+
+
+class RequestProfile:
+    """
+    Wall-clock stack samples for a single request. The event-loop thread is
+    only sampled while this request's task is the one running, and thread-pool
+    work is sampled for threads entered through `to_thread`, so concurrent
+    requests do not leak into the profile.
+    """
+
+    def __init__(self, label: str, interval: float):
+        self.id = uuid.uuid4().hex
+        self.label = label
+        self.interval = interval
+        self.loop = asyncio.get_running_loop()
+        self.task = asyncio.current_task()
+        self.loop_thread = threading.get_ident()
+        self.threads = set()
+        self.threads_lock = threading.Lock()
+        self.stacks = Counter()
+        self.started_at = datetime.now().isoformat()
+        self.duration = 0.0
+        self._start_time = 0.0
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._run, name=f"profile-{self.id[:8]}", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            sampled = False
+
+            if asyncio.current_task(self.loop) is self.task and self.loop_thread in frames:
+                self.stacks[f"event-loop;{_collapse(frames[self.loop_thread])}"] += 1
+                sampled = True
+            with self.threads_lock:
+                threads = list(self.threads)
+            for thread_id in threads:
+                if thread_id in frames:
+                    self.stacks[f"thread-pool;{_collapse(frames[thread_id])}"] += 1
+                    sampled = True
+
+            if not sampled:
+                # Neither running nor in a worker thread: awaiting I/O or the loop
+                self.stacks["<waiting>"] += 1
+
+    def start(self):
+        self._start_time = time.perf_counter()
+        self._sampler.start()
+
+    def stop(self):
+        self._stop.set()
+        self._sampler.join()
+        self.duration = time.perf_counter() - self._start_time
+
+    def metadata(self) -> dict:
+        return {
+            'profile_id': self.id,
+            'label': self.label,
+            'started_at': self.started_at,
+            'duration_ms': round(self.duration * 1000, 3),
+            'samples': sum(self.stacks.values())
+        }
+
+    def collapsed(self) -> str:
+        return _render(self.stacks)
+
+
+class ContinuousProfiler:
+    """Low-rate background sampler aggregating stacks of every thread in the process"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks = Counter()
+        self.since = datetime.now().isoformat()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="continuous-profiler", daemon=True)
+
+    def _run(self):
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            if len(names) != threading.active_count():
+                names = {t.ident: t.name for t in threading.enumerate()}
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, frame in frames.items():
+                    if thread_id != own_id:
+                        self.stacks[f"{names.get(thread_id, thread_id)};{_collapse(frame)}"] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self, reset: bool = False) -> str:
+        with self._lock:
+            output = _render(self.stacks)
+            if reset:
+                self.stacks = Counter()
+                self.since = datetime.now().isoformat()
+        return output
+
+
+class ProfileStore:
+    """Keeps the most recent request profiles in memory"""
+
+    def __init__(self, max_profiles: int = 50):
+        self.max_profiles = max_profiles
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profile: RequestProfile):
+        with self._lock:
+            self._profiles[profile.id] = profile
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str):
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def summaries(self) -> list:
+        with self._lock:
+            return [profile.metadata() for profile in reversed(self._profiles.values())]
+
+
+class Profiler:
+    def __init__(self, interval: float = 0.005, max_profiles: int = 50, continuous_interval: float = 0.0):
+        self.interval = interval
+        self.store = ProfileStore(max_profiles)
+        self.continuous = ContinuousProfiler(continuous_interval) if continuous_interval > 0 else None
+
+    def start_request(self, label: str) -> RequestProfile:
+        """Begin profiling the calling task; must be called from inside the request coroutine"""
+        profile = RequestProfile(label, self.interval)
+        _active_profile.set(profile)
+        profile.start()
+        return profile
+
+    def finish_request(self, profile: RequestProfile):
+        profile.stop()
+        _active_profile.set(None)
+        self.store.add(profile)
+
+
+async def to_thread(func, *args, **kwargs):
+    """`asyncio.to_thread` that makes the worker thread visible to an active request profile"""
+    profile = _active_profile.get()
+    if profile is None:
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+    def run():
+        thread_id = threading.get_ident()
+        with profile.threads_lock:
+            profile.threads.add(thread_id)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with profile.threads_lock:
+                profile.threads.discard(thread_id)
+
+    return await asyncio.to_thread(run)
@@ -1,15 +1,42 @@
 import uvicorn
+import asyncio
+import hmac
+import sqlite3
 import time
+from typing import List, Literal, Optional
 from datetime import datetime
-from fastapi import FastAPI, HTTPException, APIRouter
+from fastapi import FastAPI, HTTPException, APIRouter, Depends, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from schemas import (TextInput, AnalysisResult)
+from schemas import (TextInput, AnalysisResult, JobStatus, JobStatusQuery, ProfileSummary,
+                     AnalysisPage, BatchInput, BatchAnalysisResult)
 from models.medical_classifier import MedicalClassifier
 from models.fake_detector import FakeDetector
+from models.text_analysis import AnalyzedText
+from models.evidence_ranker import EvidenceRanker
 from services.wikipedia_service import WikipediaService
 from services.pubmed_service import PubMedService
+from services.evidence_service import EvidenceService
+from services.evidence_worker import EvidenceWorkerPool
 from database.db import Database
+from database.job_queue import JobQueue
+from database.export import EXPORT_FORMATS, EXPORT_MEDIA_TYPES
+from database.archive import ArchiveStore
+from database.retention import Compactor, RetentionWorker
+from metrics import STAGE_LATENCY, REQUEST_LATENCY, RESPONSE_TIER, render_prometheus
+from log import configure_logging
+from profiling import Profiler
+from admission import AdmissionController, AdmissionRejected
+from live_stats import StatsBroadcaster
+from deadline import (Deadline, DeadlineExceeded, TIER_FULL, TIER_NO_PUBMED,
+                      TIER_NO_WIKIPEDIA, TIER_NO_EVIDENCE, TIER_LEXICAL_ONLY)
+import profiling
+import config
+import logging
+
+configure_logging(config.LOG_LEVEL, config.LOG_SAMPLE_RATE)
+logger = logging.getLogger(__name__)
 
 # -------------------------------
 # Initialize App and Middleware
@@ -26,100 +53,423 @@ app.add_middleware(
 # -------------------------------
 # Initialize Services
 # -------------------------------
-medical_classifier = MedicalClassifier()
+medical_classifier = MedicalClassifier(**config.keyword_index_options())
 fake_detector = FakeDetector()
-wikipedia_service = WikipediaService()
-pubmed_service = PubMedService()
-db = Database()
+wikipedia_service = WikipediaService(config.WIKIPEDIA_SUMMARY_URL)
+pubmed_service = PubMedService(config.PUBMED_EUTILS_URL, max_articles=config.PUBMED_MAX_ARTICLES)
+# Re-ranking reuses the classifier's already-loaded encoder
+evidence_ranker = EvidenceRanker(medical_classifier.model, cache_size=config.EVIDENCE_EMBEDDING_CACHE_SIZE)
+evidence_service = EvidenceService(wikipedia_service, pubmed_service,
+                                   ranker=evidence_ranker, top_k=config.EVIDENCE_TOP_K)
+archive = ArchiveStore(config.ARCHIVE_DIR)
+db = Database(config.DB_PATH, archive=archive)
+retention_worker = RetentionWorker(
+    Compactor(db, archive, config.RETENTION_DAYS, batch_size=config.COMPACTION_BATCH_SIZE),
+    interval=config.COMPACTION_INTERVAL
+) if config.RETENTION_DAYS > 0 else None
+job_queue = JobQueue(config.JOB_QUEUE_DB_PATH, max_attempts=config.JOB_MAX_ATTEMPTS)
+evidence_workers = EvidenceWorkerPool(
+    job_queue, evidence_service,
+    workers=config.EVIDENCE_WORKERS,
+    poll_interval=config.JOB_POLL_INTERVAL
+)
+stats_broadcaster = StatsBroadcaster(
+    db,
+    interval=config.STATS_PUBLISH_INTERVAL,
+    resync_interval=config.STATS_RESYNC_INTERVAL
+)
+admission = AdmissionController(
+    max_concurrency=config.ADMISSION_MAX_CONCURRENCY,
+    max_queue={
+        'interactive': config.ADMISSION_MAX_QUEUE_INTERACTIVE,
+        'batch': config.ADMISSION_MAX_QUEUE_BATCH
+    },
+    queue_timeout=config.ADMISSION_QUEUE_TIMEOUT
+)
+# The continuous sampler's output is only readable through the admin endpoints,
+# so it never runs while they are disabled
+continuous_profiling = config.PROFILING_ENABLED and config.CONTINUOUS_PROFILE_HZ > 0
+profiler = Profiler(
+    interval=config.PROFILE_INTERVAL_MS / 1000,
+    max_profiles=config.PROFILE_MAX_STORED,
+    continuous_interval=1 / config.CONTINUOUS_PROFILE_HZ if continuous_profiling else 0.0
+)
 
 # -------------------------------
 # Define Router
 # -------------------------------
 api_router = APIRouter()
 
+
+@api_router.on_event("startup")
+async def start_evidence_workers():
+    evidence_workers.start()
+    await stats_broadcaster.start()
+    if retention_worker:
+        retention_worker.start()
+    if profiler.continuous:
+        profiler.continuous.start()
+    if config.CONTINUOUS_PROFILE_HZ > 0 and not config.PROFILING_ENABLED:
+        logger.warning("CONTINUOUS_PROFILE_HZ is ignored because PROFILING_ENABLED is not set")
+    if config.PROFILING_ENABLED and not config.ADMIN_TOKEN:
+        logger.warning("PROFILING_ENABLED is set without ADMIN_TOKEN; admin endpoints will refuse all requests")
+
+
+@api_router.on_event("shutdown")
+async def stop_evidence_workers():
+    await evidence_workers.stop()
+    await stats_broadcaster.stop()
+    if retention_worker:
+        await retention_worker.stop()
+    if profiler.continuous:
+        profiler.continuous.stop()
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Guard for admin endpoints and per-request profiling"""
+    if not config.PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    if not config.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="No admin token is configured")
+    if not hmac.compare_digest((x_admin_token or "").encode(), config.ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
 @api_router.post("/analyze", response_model=AnalysisResult)
-async def analyze_text(input_data: TextInput):
+async def analyze_text(input_data: TextInput,
+                       x_priority: str = Header("interactive"),
+                       x_profile: Optional[str] = Header(None),
+                       x_admin_token: Optional[str] = Header(None)):
     start_time = time.time()
+    deadline_ms = min(input_data.deadline_ms or config.REQUEST_DEADLINE_MS, config.MAX_REQUEST_DEADLINE_MS)
+    deadline = Deadline(deadline_ms / 1000)
+    outcome = "error"
+    profile = None
+    profile_requested = bool(x_profile) and x_profile.lower() in ("1", "true", "yes")
+    if profile_requested:
+        require_admin(x_admin_token)
     try:
-        print("Received input:", input_data)
-        text = input_data.text
-
-        print("Checking if medical...")
-        is_medical, medical_conf = medical_classifier.predict(text)
-        print(f"is_medical: {is_medical}, confidence: {medical_conf}")
-
-        if not is_medical:
-            return AnalysisResult(
-                is_medical=is_medical,
-                medical_confidence=medical_conf,
-                is_fake=False,
-                fake_confidence=0.0,
-                evidence="Not a medical statement.",
-                sources=[],
-                processing_time=time.time() - start_time
-            )
-
-        print("Checking if fake...")
-        is_fake, fake_conf = fake_detector.predict(text)
-        print(f"is_fake: {is_fake}, confidence: {fake_conf}")
-
-        print("Getting evidence...")
-        evidence, sources = await get_evidence(text)
-        print("Evidence:", evidence)
-
-        print("Storing result...")
-        db.store_result({
+        # Time spent queued for a slot counts against the request's deadline
+        async with admission.slot(x_priority.lower(), timeout=deadline.remaining()):
+            if profile_requested:
+                profile = profiler.start_request(label=f"analyze:{input_data.text[:60]}")
+            result = await run_analysis(input_data, start_time, deadline)
+            result.profile_id = profile.id if profile else None
+            outcome = "ok" if result.is_medical else "not_medical"
+            RESPONSE_TIER.inc(tier=result.tier)
+            return result
+
+    except AdmissionRejected as e:
+        outcome = "shed"
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except Exception as e:
+        logger.exception("Analysis failed")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        REQUEST_LATENCY.labels(outcome=outcome).observe(time.time() - start_time)
+        if profile:
+            profiler.finish_request(profile)
+
+
+async def classify(doc: AnalyzedText, deadline: Deadline) -> tuple[bool, float, bool]:
+    """Semantic classification within the deadline, falling back to the lexical verdict"""
+    if deadline.remaining() * 1000 >= config.CLASSIFY_MIN_BUDGET_MS:
+        try:
+            # The classifier checks the deadline between encoder batches and stops
+            # itself; abandoning the thread would leave it burning CPU under overload
+            is_medical, medical_conf = await profiling.to_thread(medical_classifier.predict, doc, deadline=deadline)
+            return is_medical, medical_conf, False
+        except DeadlineExceeded:
+            logger.info("Classifier missed the deadline; serving lexical verdict")
+    is_medical, medical_conf = medical_classifier.predict_lexical(doc)
+    return is_medical, medical_conf, True
+
+
+def served_tier(planned: str, failed: list) -> str:
+    """The tier actually delivered, once sources that timed out or errored are accounted for"""
+    wikipedia = "Wikipedia" not in failed
+    pubmed = planned == TIER_FULL and "PubMed" not in failed
+    if wikipedia and pubmed:
+        return TIER_FULL
+    if wikipedia:
+        return TIER_NO_PUBMED
+    if pubmed:
+        return TIER_NO_WIKIPEDIA
+    return TIER_NO_EVIDENCE
+
+
+def evidence_tier(deadline: Deadline) -> str:
+    remaining_ms = deadline.remaining() * 1000
+    if remaining_ms >= config.PUBMED_MIN_BUDGET_MS:
+        return TIER_FULL
+    if remaining_ms >= config.EVIDENCE_MIN_BUDGET_MS:
+        return TIER_NO_PUBMED
+    return TIER_NO_EVIDENCE
+
+
+async def run_analysis(input_data: TextInput, start_time: float, deadline: Deadline) -> AnalysisResult:
+    """Classify, detect, gather evidence and store one text, degrading to fit the deadline"""
+    logger.debug("Received input: %s", input_data)
+    text = input_data.text
+    # One preprocessed document shared by every stage below
+    doc = AnalyzedText(text)
+
+    with STAGE_LATENCY.labels(stage="classify").time():
+        is_medical, medical_conf, lexical_only = await classify(doc, deadline)
+    logger.debug("is_medical: %s, confidence: %s", is_medical, medical_conf)
+
+    if not is_medical:
+        return AnalysisResult(
+            is_medical=is_medical,
+            medical_confidence=medical_conf,
+            is_fake=False,
+            fake_confidence=0.0,
+            evidence="Not a medical statement.",
+            sources=[],
+            processing_time=time.time() - start_time,
+            tier=TIER_LEXICAL_ONLY if lexical_only else TIER_FULL
+        )
+
+    # Lexical indicator matching; cheap enough to always run
+    with STAGE_LATENCY.labels(stage="detect").time():
+        is_fake, fake_conf = fake_detector.predict(doc)
+    logger.debug("is_fake: %s, confidence: %s", is_fake, fake_conf)
+
+    job_id = None
+    tier = TIER_LEXICAL_ONLY if lexical_only else evidence_tier(deadline)
+    if input_data.defer_evidence:
+        with STAGE_LATENCY.labels(stage="enqueue").time():
+            job_id = await profiling.to_thread(job_queue.enqueue, text, evidence_service.search_key(doc))
+        evidence, sources = "Evidence enrichment pending.", []
+        tier = TIER_LEXICAL_ONLY if lexical_only else TIER_FULL
+        logger.debug("Evidence job: %s", job_id)
+    elif tier in (TIER_FULL, TIER_NO_PUBMED):
+        with STAGE_LATENCY.labels(stage="evidence").time():
+            evidence, sources, failed = await evidence_service.lookup(
+                doc, deadline, include_pubmed=tier == TIER_FULL)
+        tier = served_tier(tier, failed)
+        logger.debug("Evidence: %s", evidence)
+    else:
+        evidence, sources = "Evidence skipped to meet the request deadline.", []
+
+    with STAGE_LATENCY.labels(stage="store").time():
+        record = {
             'text': text,
             'is_medical': is_medical,
             'medical_confidence': medical_conf,
             'is_fake': is_fake,
             'fake_confidence': fake_conf,
             'timestamp': datetime.now().isoformat()
-        })
+        }
+        try:
+            await profiling.to_thread(db.store_result, record, timeout=max(deadline.remaining(), 0.1))
+            stats_broadcaster.record(record)
+        except sqlite3.OperationalError as e:
+            # Lock wait exceeded the remaining budget; the verdict is still served
+            logger.warning("Skipped storing result within deadline: %s", e)
 
-        print("Returning response.")
-        return AnalysisResult(
+    return AnalysisResult(
+        is_medical=is_medical,
+        medical_confidence=medical_conf,
+        is_fake=is_fake,
+        fake_confidence=fake_conf,
+        evidence=evidence,
+        sources=sources,
+        processing_time=time.time() - start_time,
+        job_id=job_id,
+        tier=tier
+    )
+
+
+@api_router.post("/analyze/batch", response_model=BatchAnalysisResult)
+async def analyze_batch(batch: BatchInput, x_priority: str = Header("batch")):
+    """
+    Analyze many texts in one request. Classification runs as a single batched
+    encoder pass and results are stored in one transaction; the whole batch
+    holds one admission slot.
+    """
+    start_time = time.time()
+    outcome = "error"
+    try:
+        async with admission.slot(x_priority.lower()):
+            results = await run_batch_analysis(batch, start_time)
+            outcome = "ok"
+            return BatchAnalysisResult(results=results, processing_time=time.time() - start_time)
+
+    except AdmissionRejected as e:
+        outcome = "shed"
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except Exception as e:
+        logger.exception("Batch analysis failed")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        REQUEST_LATENCY.labels(outcome=f"batch_{outcome}").observe(time.time() - start_time)
+
+
+async def run_batch_analysis(batch: BatchInput, start_time: float) -> List[AnalysisResult]:
+    docs = [AnalyzedText(text) for text in batch.texts]
+
+    with STAGE_LATENCY.labels(stage="batch_classify").time():
+        verdicts = await profiling.to_thread(medical_classifier.predict_batch, docs)
+    medical = [i for i, (is_medical, _) in enumerate(verdicts) if is_medical]
+
+    with STAGE_LATENCY.labels(stage="batch_detect").time():
+        detections = {i: fake_detector.predict(docs[i]) for i in medical}
+
+    evidence = {}
+    job_ids = {}
+    if batch.defer_evidence:
+        with STAGE_LATENCY.labels(stage="batch_enqueue").time():
+            ids = await profiling.to_thread(
+                job_queue.enqueue_many, [(docs[i].text, evidence_service.search_key(docs[i])) for i in medical])
+        job_ids = dict(zip(medical, ids))
+        evidence = {i: ("Evidence enrichment pending.", []) for i in medical}
+    else:
+        limit = asyncio.Semaphore(config.BATCH_EVIDENCE_CONCURRENCY)
+
+        async def lookup(i: int):
+            async with limit:
+                evidence[i] = await evidence_service.get_evidence(docs[i])
+
+        with STAGE_LATENCY.labels(stage="batch_evidence").time():
+            await asyncio.gather(*(lookup(i) for i in medical))
+
+    timestamp = datetime.now().isoformat()
+    results, rows = [], []
+    for i, (doc, (is_medical, medical_conf)) in enumerate(zip(docs, verdicts)):
+        is_fake, fake_conf = detections.get(i, (False, 0.0))
+        evidence_text, sources = evidence.get(i, ("Not a medical statement.", []))
+        results.append(AnalysisResult(
             is_medical=is_medical,
             medical_confidence=medical_conf,
             is_fake=is_fake,
             fake_confidence=fake_conf,
-            evidence=evidence,
+            evidence=evidence_text,
             sources=sources,
-            processing_time=time.time() - start_time
-        )
-
+            processing_time=time.time() - start_time,
+            job_id=job_ids.get(i)
+        ))
+        if is_medical:
+            rows.append({
+                'text': doc.text,
+                'is_medical': is_medical,
+                'medical_confidence': medical_conf,
+                'is_fake': is_fake,
+                'fake_confidence': fake_conf,
+                'timestamp': timestamp
+            })
 
-    except Exception as e:
-        print("Exception occurred:", e)
-        raise HTTPException(status_code=500, detail=str(e))
+    if rows:
+        with STAGE_LATENCY.labels(stage="batch_store").time():
+            await profiling.to_thread(db.store_results, rows)
+        for row in rows:
+            stats_broadcaster.record(row)
+    return results
 
 
 @api_router.get("/stats")
 async def get_stats():
-    """Get analysis statistics"""
-    return db.get_stats()
+    """Get analysis statistics from the in-memory aggregate"""
+    return stats_broadcaster.snapshot()
 
 
-# -------------------------------
-# Helper Functions
-# -------------------------------
-async def get_evidence(text: str):
-    """Get evidence from multiple sources"""
-    evidence_parts = []
-    sources = []
-
-    wiki_evidence = await wikipedia_service.get_evidence(text)
-    if wiki_evidence:
-        evidence_parts.append(f"Wikipedia: {wiki_evidence}")
-        sources.append("Wikipedia")
-
-    pubmed_evidence = await pubmed_service.get_evidence(text)
-    if pubmed_evidence:
-        evidence_parts.append(f"PubMed: {pubmed_evidence}")
-        sources.append("PubMed")
-
-    evidence = " | ".join(evidence_parts) if evidence_parts else "No evidence found."
-    return evidence, sources
+@api_router.get("/stats/stream")
+async def stream_stats():
+    """Server-sent events: a `snapshot` event, then a `delta` event with the changed fields whenever stats move"""
+    return StreamingResponse(
+        stats_broadcaster.events(),
+        media_type="text/event-stream",
+        headers={'Cache-Control': "no-cache", 'X-Accel-Buffering': "no"}
+    )
+
+
+def analysis_filters(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    is_fake: Optional[bool] = None,
+    min_confidence: Optional[float] = Query(None, ge=0.0, le=1.0),
+    max_confidence: Optional[float] = Query(None, ge=0.0, le=1.0),
+    q: Optional[str] = Query(None, min_length=1, max_length=200)
+) -> dict:
+    """Filters shared by /analyses and /export; confidence bounds apply to fake_confidence"""
+    return {
+        'since': since.isoformat() if since else None,
+        'until': until.isoformat() if until else None,
+        'is_fake': is_fake,
+        'min_confidence': min_confidence,
+        'max_confidence': max_confidence,
+        'search': q
+    }
+
+
+@api_router.get("/analyses", response_model=AnalysisPage)
+async def list_analyses(limit: int = Query(50, ge=1, le=500), cursor: Optional[int] = None,
+                        include_archive: bool = False, filters: dict = Depends(analysis_filters)):
+    """Stored analyses, newest first, one keyset-paginated page at a time"""
+    return await asyncio.to_thread(db.get_analyses, limit, cursor, include_archive, **filters)
+
+
+@api_router.get("/export")
+async def export_analyses(format: Literal["ndjson", "csv"] = "ndjson", include_archive: bool = False,
+                          filters: dict = Depends(analysis_filters)):
+    """Stream every matching analysis, oldest first, without buffering the result set"""
+    # The sync generator is iterated in the threadpool, so database reads stay off the event loop
+    chunks = EXPORT_FORMATS[format](db.iter_analyses(include_archive=include_archive, **filters))
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={'Content-Disposition': f'attachment; filename="analyses.{format}"'}
+    )
+
+
+@api_router.get("/admission")
+async def get_admission_status():
+    """Current admission slots, queue depth and shed counts"""
+    return admission.status()
+
+
+@api_router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Latency histograms and counters in Prometheus text format"""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@api_router.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    """Get the status of a deferred evidence job"""
+    job = await asyncio.to_thread(job_queue.get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@api_router.post("/jobs/status", response_model=List[JobStatus])
+async def get_jobs(query: JobStatusQuery):
+    """Get the status of many deferred evidence jobs at once"""
+    return await asyncio.to_thread(job_queue.get_jobs, query.job_ids)
+
+
+@api_router.get("/admin/profiles", response_model=List[ProfileSummary], dependencies=[Depends(require_admin)])
+async def list_profiles():
+    """List stored per-request profiles, newest first"""
+    return profiler.store.summaries()
+
+
+@api_router.get("/admin/profiles/continuous", response_class=PlainTextResponse, dependencies=[Depends(require_admin)])
+async def get_continuous_profile(reset: bool = False):
+    """Aggregated continuous-profiling samples in collapsed-stack format"""
+    if profiler.continuous is None:
+        raise HTTPException(status_code=404, detail="Continuous profiling is disabled")
+    return PlainTextResponse(profiler.continuous.collapsed(reset=reset))
+
+
+@api_router.get("/admin/profiles/{profile_id}", response_class=PlainTextResponse, dependencies=[Depends(require_admin)])
+async def get_profile(profile_id: str):
+    """A single request profile in collapsed-stack format, ready for flamegraph.pl or speedscope"""
+    profile = profiler.store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(profile.collapsed())
 
 
 # -------------------------------
@@ -1,8 +1,15 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field
+from typing import List, Optional
 
 class TextInput(BaseModel):
     text: str
+    defer_evidence: bool = False
+    deadline_ms: Optional[int] = Field(None, gt=0)
+
+class BatchInput(BaseModel):
+    texts: List[str] = Field(..., min_length=1, max_length=500)
+    # Evidence lookups dominate per-text latency, so batches enqueue them by default
+    defer_evidence: bool = True
 
 class AnalysisResult(BaseModel):
     is_medical: bool
@@ -12,3 +19,43 @@ class AnalysisResult(BaseModel):
     evidence: str
     sources: List[str]
     processing_time: float
+    tier: str = "full"
+    job_id: Optional[str] = None
+    profile_id: Optional[str] = None
+
+class BatchAnalysisResult(BaseModel):
+    results: List[AnalysisResult]
+    processing_time: float
+
+class JobStatus(BaseModel):
+    job_id: str
+    status: str
+    attempts: int
+    error: Optional[str] = None
+    evidence: Optional[str] = None
+    sources: List[str] = []
+    created_at: str
+    updated_at: str
+
+class ProfileSummary(BaseModel):
+    profile_id: str
+    label: str
+    started_at: str
+    duration_ms: float
+    samples: int
+
+class JobStatusQuery(BaseModel):
+    job_ids: List[str] = Field(..., max_length=500)
+
+class AnalysisRecord(BaseModel):
+    id: int
+    text: str
+    is_medical: bool
+    medical_confidence: float
+    is_fake: bool
+    fake_confidence: float
+    timestamp: str
+
+class AnalysisPage(BaseModel):
+    items: List[AnalysisRecord]
+    next_cursor: Optional[int] = None
@@ -0,0 +1,93 @@
+import asyncio
+import hashlib
+import json
+import logging
+from collections import namedtuple
+from services.wikipedia_service import WikipediaService
+from services.pubmed_service import PubMedService
+from services.upstream import UpstreamError
+from metrics import STAGE_LATENCY
+from deadline import Deadline
+from models.evidence_ranker import EvidenceRanker, Passage
+from models.text_analysis import AnalyzedText
+import profiling
+
+logger = logging.getLogger(__name__)
+
+# `failed` names the sources that were queried but could not be reached
+EvidenceResult = namedtuple("EvidenceResult", ["evidence", "sources", "failed"])
+
+
+class EvidenceService:
+    def __init__(self, wikipedia_service: WikipediaService, pubmed_service: PubMedService,
+                 ranker: EvidenceRanker = None, top_k: int = 3):
+        """
+        `ranker` re-orders the candidate passages from every source by similarity
+        to the claim; without one, passages keep their upstream order.
+        """
+        self.wikipedia_service = wikipedia_service
+        self.pubmed_service = pubmed_service
+        self.ranker = ranker
+        self.top_k = top_k
+
+    def search_key(self, text) -> str:
+        """Stable key for the upstream lookups `get_evidence` would make for this text"""
+        doc = AnalyzedText.of(text)
+        wiki_terms = sorted(self.wikipedia_service._extract_terms(doc))
+        pubmed_terms = sorted(doc.medical_terms[:3])
+        return hashlib.sha1(json.dumps([wiki_terms, pubmed_terms]).encode()).hexdigest()
+
+    async def _timed(self, stage: str, lookup):
+        """Run one source's lookup; returns its passages, or None if the source failed"""
+        with STAGE_LATENCY.labels(stage=stage).time():
+            try:
+                return await lookup
+            except UpstreamError as e:
+                logger.warning("Evidence source unavailable: %s", e)
+                return None
+
+    async def _rank(self, doc: AnalyzedText, passages: list, deadline: Deadline = None) -> list:
+        if self.ranker is None or (deadline is not None and deadline.expired()):
+            return passages[:self.top_k]
+        try:
+            with STAGE_LATENCY.labels(stage="evidence_rerank").time():
+                ranked = await profiling.to_thread(self.ranker.rank, doc.text, passages, self.top_k)
+            return [passage for passage, _ in ranked]
+        except Exception as e:
+            logger.warning("Evidence re-ranking failed, keeping upstream order: %s", e)
+            return passages[:self.top_k]
+
+    @staticmethod
+    def _format(passage: Passage) -> str:
+        if passage.source == "PubMed":
+            return f"PubMed: {passage.text} (PMID {passage.ref})"
+        text = passage.text[:300] + "..." if len(passage.text) > 300 else passage.text
+        return f"{passage.source}: {text}"
+
+    async def lookup(self, text, deadline: Deadline = None, include_pubmed: bool = True) -> EvidenceResult:
+        """
+        Get evidence from multiple sources. The lookups run concurrently and
+        every upstream call is bounded by what is left of `deadline`. All
+        candidate passages are pooled and only the `top_k` most relevant to
+        the claim are returned, along with the sources that failed.
+        """
+        doc = AnalyzedText.of(text)
+
+        lookups = {"Wikipedia": self._timed("evidence_wikipedia", self.wikipedia_service.get_passages(doc, deadline))}
+        if include_pubmed:
+            lookups["PubMed"] = self._timed("evidence_pubmed", self.pubmed_service.get_passages(doc, deadline))
+        results = dict(zip(lookups, await asyncio.gather(*lookups.values())))
+        failed = [source for source, passages in results.items() if passages is None]
+        candidates = [passage for passages in results.values() if passages for passage in passages]
+        if not candidates:
+            return EvidenceResult("No evidence found.", [], failed)
+
+        passages = await self._rank(doc, candidates, deadline)
+        evidence = " | ".join(self._format(passage) for passage in passages)
+        sources = list(dict.fromkeys(passage.source for passage in passages))
+        return EvidenceResult(evidence, sources, failed)
+
+    async def get_evidence(self, text, deadline: Deadline = None, include_pubmed: bool = True) -> tuple[str, list]:
+        """`lookup` as (evidence, sources), for callers that serve partial results as they are"""
+        result = await self.lookup(text, deadline, include_pubmed)
+        return result.evidence, result.sources
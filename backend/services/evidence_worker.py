@@ -0,0 +1,65 @@
+import asyncio
+import logging
+from database.job_queue import JobQueue
+from services.evidence_service import EvidenceService
+from services.upstream import UpstreamError
+
+logger = logging.getLogger(__name__)
+
+
+class EvidenceWorkerPool:
+    """Drains the evidence job queue with a fixed number of concurrent workers"""
+
+    def __init__(self, job_queue: JobQueue, evidence_service: EvidenceService,
+                 workers: int = 4, poll_interval: float = 0.5):
+        self.job_queue = job_queue
+        self.evidence_service = evidence_service
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._tasks = []
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self):
+        while True:
+            try:
+                job = await asyncio.to_thread(self.job_queue.claim)
+            except Exception as e:
+                # e.g. "database is locked" past the busy timeout; keep the worker alive
+                logger.warning("Claiming an evidence job failed: %s", e)
+                await asyncio.sleep(self.poll_interval)
+                continue
+            if job is None:
+                await asyncio.sleep(self.poll_interval)
+                continue
+            await self._process(job)
+
+    async def _process(self, job: dict):
+        try:
+            # Another job with the same search terms may already have resolved it
+            result = await asyncio.to_thread(self.job_queue.get_result, job['dedup_key'])
+            partial = False
+            if result is None:
+                lookup = await self.evidence_service.lookup(job['text'])
+                if lookup.failed:
+                    # An outage goes through fail() and is retried, never stored as "no evidence";
+                    # on the last attempt whatever the other source found is kept, uncached
+                    if job['attempts'] < self.job_queue.max_attempts or not lookup.sources:
+                        raise UpstreamError(", ".join(lookup.failed), "unavailable")
+                    partial = True
+                result = lookup.evidence, lookup.sources
+            evidence, sources = result
+            await asyncio.to_thread(self.job_queue.complete, job['dedup_key'], evidence, sources,
+                                    job['id'], job.get('claimed_at'), partial)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Evidence job %s failed (attempt %s): %s", job['id'], job['attempts'], e)
+            await asyncio.to_thread(self.job_queue.fail, job['id'], job['attempts'], str(e))
@@ -2,84 +2,103 @@ import aiohttp
 import ssl
 from aiohttp import TCPConnector
 import xml.etree.ElementTree as ET
-import re
+import logging
+from metrics import UPSTREAM_LATENCY, UPSTREAM_ERRORS
+from deadline import Deadline, cap_timeout
+from models.text_analysis import AnalyzedText
+from models.evidence_ranker import Passage
+from services.upstream import UpstreamError
+
+logger = logging.getLogger(__name__)
 
 class PubMedService:
-    def __init__(self):
-        self.search_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
-        self.summary_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esummary.fcgi"
+    def __init__(self, base_url: str = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils",
+                 max_articles: int = 5):
+        self.search_url = f"{base_url}/esearch.fcgi"
+        self.summary_url = f"{base_url}/esummary.fcgi"
+        self.max_articles = max_articles
 
-    async def get_evidence(self, text: str) -> str:
+    async def get_evidence(self, text, deadline: Deadline = None) -> str:
         try:
-            search_terms = self._extract_search_terms(text)
-            if not search_terms:
-                return ""
-
-            pmids = await self._search_pubmed(search_terms)
-            if pmids:
-                summary = await self._get_article_summary(pmids[0])
-                return summary
-
-            return ""
-        except Exception as e:
-            print(f"PubMed service error: {e}")
+            passages = await self.get_passages(text, deadline)
+        except UpstreamError as e:
+            logger.warning("PubMed service error: %s", e)
             return ""
-
-    def _extract_search_terms(self, text: str) -> str:
-        medical_terms = re.findall(r'\b(?:cancer|diabetes|covid|vaccine|treatment|therapy|drug|disease)\b',
-                                   text.lower())
-        return " AND ".join(set(medical_terms[:3]))
-
-    async def _search_pubmed(self, search_terms: str) -> list:
+        return passages[0].text if passages else ""
+
+    async def get_passages(self, text, deadline: Deadline = None) -> list:
+        """Titles of the top search hits, fetched in a single esummary call. Raises UpstreamError on failure."""
+        search_terms = self._extract_search_terms(text)
+        if not search_terms:
+            return []
+
+        pmids = await self._search_pubmed(search_terms, cap_timeout(deadline, 10))
+        if not pmids:
+            return []
+        titles = await self._get_article_titles(pmids, cap_timeout(deadline, 10))
+        return [Passage("PubMed", pmid, titles[pmid]) for pmid in pmids if titles.get(pmid)]
+
+    def _extract_search_terms(self, text) -> str:
+        return " AND ".join(AnalyzedText.of(text).medical_terms[:3])
+
+    def _connector(self) -> TCPConnector:
+        sslcontext = ssl.create_default_context()
+        sslcontext.check_hostname = False
+        sslcontext.verify_mode = ssl.CERT_NONE
+        return TCPConnector(ssl=sslcontext)
+
+    def _failed(self, call: str, error: str):
+        UPSTREAM_ERRORS.inc(service="pubmed", call=call)
+        logger.warning("PubMed %s error: %s", call, error)
+        raise UpstreamError("PubMed", f"{call}: {error}")
+
+    async def _search_pubmed(self, search_terms: str, timeout: float = 10) -> list:
+        if timeout <= 0:
+            raise UpstreamError("PubMed", "no time left in the request deadline")
         try:
             params = {
                 'db': 'pubmed',
                 'term': search_terms,
-                'retmax': '3',
+                'retmax': str(self.max_articles),
                 'retmode': 'xml'
             }
 
-            sslcontext = ssl.create_default_context()
-            sslcontext.check_hostname = False
-            sslcontext.verify_mode = ssl.CERT_NONE
-
-            connector = TCPConnector(ssl=sslcontext)
-
-            async with aiohttp.ClientSession(connector=connector) as session:
-                async with session.get(self.search_url, params=params, timeout=10) as response:
-                    if response.status == 200:
-                        content = await response.text()
-                        root = ET.fromstring(content)
-                        pmids = [id_elem.text for id_elem in root.findall('.//Id')]
-                        return pmids
-
+            with UPSTREAM_LATENCY.labels(service="pubmed", call="esearch").time():
+                async with aiohttp.ClientSession(connector=self._connector()) as session:
+                    async with session.get(self.search_url, params=params,
+                                           timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                        if response.status == 200:
+                            content = await response.text()
+                            root = ET.fromstring(content)
+                            pmids = [id_elem.text for id_elem in root.findall('.//Id')]
+                            return pmids
+            error = f"HTTP {response.status}"
         except Exception as e:
-            print(f"PubMed search error: {e}")
+            error = str(e) or type(e).__name__
+        self._failed("esearch", error)
 
-        return []
-
-    async def _get_article_summary(self, pmid: str) -> str:
+    async def _get_article_titles(self, pmids: list, timeout: float = 10) -> dict:
+        if timeout <= 0:
+            raise UpstreamError("PubMed", "no time left in the request deadline")
         try:
             params = {
                 'db': 'pubmed',
-                'id': pmid,
+                'id': ",".join(pmids),
                 'retmode': 'xml'
             }
 
-            sslcontext = ssl.create_default_context()
-            sslcontext.check_hostname = False
-            sslcontext.verify_mode = ssl.CERT_NONE
-
-            connector = TCPConnector(ssl=sslcontext)
-
-            async with aiohttp.ClientSession(connector=connector) as session:
-                async with session.get(self.summary_url, params=params, timeout=10) as response:
-                    if response.status == 200:
-                        content = await response.text()
-                        if 'abstract' in content.lower():
-                            return f"PubMed article {pmid} found with relevant medical information."
-
+            with UPSTREAM_LATENCY.labels(service="pubmed", call="esummary").time():
+                async with aiohttp.ClientSession(connector=self._connector()) as session:
+                    async with session.get(self.summary_url, params=params,
+                                           timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                        if response.status == 200:
+                            content = await response.text()
+                            root = ET.fromstring(content)
+                            return {
+                                doc.findtext('Id'): doc.findtext("Item[@Name='Title']") or ""
+                                for doc in root.findall('.//DocSum')
+                            }
+            error = f"HTTP {response.status}"
         except Exception as e:
-            print(f"PubMed summary error: {e}")
-
-        return ""
+            error = str(e) or type(e).__name__
+        self._failed("esummary", error)
@@ -0,0 +1,6 @@
+class UpstreamError(Exception):
+    """An evidence source could not be queried (HTTP error, timeout or exhausted budget)"""
+
+    def __init__(self, source: str, message: str):
+        super().__init__(f"{source}: {message}")
+        self.source = source
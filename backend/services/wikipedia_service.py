@@ -1,41 +1,69 @@
 import aiohttp
-import re
 import asyncio
+import logging
+from metrics import UPSTREAM_LATENCY, UPSTREAM_ERRORS
+from deadline import Deadline, cap_timeout
+from models.text_analysis import AnalyzedText
+from models.evidence_ranker import Passage
+from services.upstream import UpstreamError
+
+logger = logging.getLogger(__name__)
 
 class WikipediaService:
-    def __init__(self):
-        self.base_url = "https://en.wikipedia.org/api/rest_v1/page/summary"
+    def __init__(self, base_url: str = "https://en.wikipedia.org/api/rest_v1/page/summary"):
+        self.base_url = base_url
         self.search_url = "https://en.wikipedia.org/w/api.php"
 
-    async def get_evidence(self, text: str) -> str:
+    async def get_evidence(self, text, deadline: Deadline = None) -> str:
         try:
-            medical_terms = self._extract_terms(text)
-            if not medical_terms:
-                return ""
-            summary = await self._get_page_summary(medical_terms[0])
-            return summary[:300] + "..." if summary else ""
-        except Exception as e:
-            print(f"Wikipedia service error: {e}")
+            passages = await self.get_passages(text, deadline)
+        except UpstreamError as e:
+            logger.warning("Wikipedia service error: %s", e)
             return ""
+        return passages[0].text[:300] + "..." if passages else ""
 
-    def _extract_terms(self, text: str) -> list:
-        patterns = [
-            r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b',
-            r'\b(?:COVID-19|HIV|DNA|RNA|AIDS)\b'
+    async def get_passages(self, text, deadline: Deadline = None) -> list:
+        """
+        Summaries for every candidate term, fetched concurrently. Raises
+        UpstreamError when lookups failed and none of them returned a summary,
+        so "Wikipedia is down" is not mistaken for "no article exists".
+        """
+        medical_terms = self._extract_terms(text)
+        if not medical_terms:
+            return []
+        timeout = cap_timeout(deadline, 5)
+        summaries = await asyncio.gather(
+            *(self._get_page_summary(term, timeout) for term in medical_terms), return_exceptions=True)
+        passages = [
+            Passage("Wikipedia", term, summary)
+            for term, summary in zip(medical_terms, summaries) if isinstance(summary, str) and summary
         ]
-        terms = []
-        for p in patterns:
-            terms += re.findall(p, text)
-        return list(set(terms))[:3]
+        errors = [summary for summary in summaries if isinstance(summary, BaseException)]
+        if errors and not passages:
+            raise UpstreamError("Wikipedia", str(errors[0]))
+        return passages
 
-    async def _get_page_summary(self, term: str) -> str:
+    def _extract_terms(self, text) -> list:
+        return AnalyzedText.of(text).candidate_terms[:3]
+
+    async def _get_page_summary(self, term: str, timeout: float = 5) -> str:
+        """The article extract, or "" if there is no such article; raises UpstreamError on failure"""
+        if timeout <= 0:
+            raise UpstreamError("Wikipedia", "no time left in the request deadline")
         try:
             url = f"{self.base_url}/{term.replace(' ', '_')}"
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, timeout=5) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return data.get('extract', '')
+            with UPSTREAM_LATENCY.labels(service="wikipedia", call="summary").time():
+                async with aiohttp.ClientSession() as session:
+                    async with session.get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                        if response.status == 200:
+                            data = await response.json()
+                            return data.get('extract', '')
+            # 404 is the normal "no such article" answer, not an upstream failure
+            if response.status == 404:
+                return ""
+            error = f"HTTP {response.status}"
         except Exception as e:
-            print(f"Error fetching Wikipedia summary: {e}")
-        return ""
+            error = str(e) or type(e).__name__
+        UPSTREAM_ERRORS.inc(service="wikipedia", call="summary")
+        logger.warning("Error fetching Wikipedia summary: %s", error)
+        raise UpstreamError("Wikipedia", error)
@@ -3,6 +3,9 @@ import requests
 import json
 import time
 import pandas as pd
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
 
 # Page config
 st.set_page_config(
@@ -53,17 +56,45 @@ st.markdown("""
 # API configuration
 API_BASE_URL = "http://localhost:8000"
 
+# Live stats: how long a pushed snapshot stays valid without hearing from the
+# stream, and how often the sidebar redraws from it
+STATS_TTL = 30
+STATS_REFRESH_SECONDS = 5
+
+# Bulk upload
+BULK_CHUNK_SIZE = 100
+BULK_PARALLEL_REQUESTS = 4
+BULK_MAX_RETRIES = 5
+# Evidence is gathered by backend workers after the batch returns; poll for it
+BULK_POLL_INTERVAL = 1.0
+BULK_EVIDENCE_TIMEOUT = 300
+JOB_STATUS_CHUNK_SIZE = 500
+
+
+@st.cache_resource
+def get_session() -> requests.Session:
+    """One keep-alive connection pool shared by every rerun and upload thread"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=BULK_PARALLEL_REQUESTS)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
 
 def call_api(endpoint: str, data: dict = None):
     """Call the FastAPI backend"""
     try:
         if data:
-            response = requests.post(f"{API_BASE_URL}/{endpoint}", json=data, timeout=30)
+            response = get_session().post(f"{API_BASE_URL}/{endpoint}", json=data, timeout=30)
         else:
-            response = requests.get(f"{API_BASE_URL}/{endpoint}", timeout=10)
+            response = get_session().get(f"{API_BASE_URL}/{endpoint}", timeout=10)
 
         if response.status_code == 200:
             return response.json()
+        elif response.status_code == 503:
+            retry_after = response.headers.get("Retry-After", "a few")
+            st.warning(f"⏳ The server is busy. Please retry in {retry_after} seconds.")
+            return None
         else:
             st.error(f"API Error: {response.status_code}")
             return None
@@ -75,6 +106,224 @@ def call_api(endpoint: str, data: dict = None):
         return None
 
 
+class StatsFeed:
+    """
+    Process-wide subscriber to the backend's /stats/stream server-sent events.
+    Every browser session reads the same locally held snapshot, so the number
+    of open dashboards no longer multiplies backend load.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._heard_at = 0.0
+        # Its own session: the stream holds its connection open indefinitely
+        self._session = requests.Session()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        backoff = 1
+        while True:
+            try:
+                with self._session.get(f"{API_BASE_URL}/stats/stream", stream=True, timeout=(5, 60)) as response:
+                    response.raise_for_status()
+                    backoff = 1
+                    event = None
+                    for line in response.iter_lines(decode_unicode=True):
+                        # Keepalive comments count as hearing from the server too
+                        with self._lock:
+                            self._heard_at = time.time()
+                        if line.startswith("event:"):
+                            event = line[len("event:"):].strip()
+                        elif line.startswith("data:"):
+                            self._apply(event, json.loads(line[len("data:"):]))
+            except Exception:
+                pass
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+
+    def _apply(self, event: str, data: dict):
+        with self._lock:
+            if event == "snapshot" or self._snapshot is None:
+                self._snapshot = data
+            else:
+                self._snapshot = {**self._snapshot, **data}
+
+    def snapshot(self):
+        """The latest stats, or None if the stream has been silent for longer than STATS_TTL"""
+        with self._lock:
+            if self._snapshot is not None and time.time() - self._heard_at < STATS_TTL:
+                return dict(self._snapshot)
+        return None
+
+
+@st.cache_resource
+def get_stats_feed() -> StatsFeed:
+    return StatsFeed()
+
+
+@st.cache_data(ttl=STATS_TTL, show_spinner=False)
+def poll_stats():
+    """Fallback while the stream is down; cached so reruns do not each hit the backend"""
+    try:
+        response = get_session().get(f"{API_BASE_URL}/stats", timeout=10)
+        return response.json() if response.status_code == 200 else None
+    except requests.exceptions.RequestException:
+        return None
+
+
+@st.fragment(run_every=STATS_REFRESH_SECONDS)
+def render_stats():
+    stats = get_stats_feed().snapshot() or poll_stats()
+    if stats:
+        st.metric("Total Analyses", stats['total_analyses'])
+        st.metric("Medical Posts", f"{stats['medical_posts']} ({stats['medical_percentage']}%)")
+        st.metric("Fake Posts", f"{stats['fake_posts']} ({stats['fake_percentage']}%)")
+        st.metric("Recent (24h)", stats['recent_analyses'])
+    else:
+        st.caption("❌ Statistics unavailable: cannot reach the backend.")
+
+
+def post_batch(session: requests.Session, texts: list) -> list:
+    """Analyze one chunk via /analyze/batch, waiting out 503s for as long as the server asks"""
+    for _ in range(BULK_MAX_RETRIES):
+        response = session.post(f"{API_BASE_URL}/analyze/batch", json={"texts": texts}, timeout=300)
+        if response.status_code == 503:
+            time.sleep(float(response.headers.get("Retry-After", 1)))
+            continue
+        response.raise_for_status()
+        return response.json()["results"]
+    raise RuntimeError("Server stayed busy; try a smaller file or retry later")
+
+
+def collect_evidence(session: requests.Session, rows: list, progress) -> int:
+    """
+    Poll the deferred evidence jobs of `rows` until they finish or
+    BULK_EVIDENCE_TIMEOUT passes, merging the evidence into the rows in place.
+    Returns the number of jobs still pending.
+    """
+    pending = {row["job_id"]: row for row in rows if row.get("job_id")}
+    total = len(pending)
+    give_up_at = time.time() + BULK_EVIDENCE_TIMEOUT
+
+    while pending and time.time() < give_up_at:
+        job_ids = list(pending)
+        for i in range(0, len(job_ids), JOB_STATUS_CHUNK_SIZE):
+            response = session.post(f"{API_BASE_URL}/jobs/status",
+                                    json={"job_ids": job_ids[i:i + JOB_STATUS_CHUNK_SIZE]}, timeout=30)
+            response.raise_for_status()
+            for job in response.json():
+                if job["status"] == "done":
+                    row = pending.pop(job["job_id"])
+                    row["evidence"], row["sources"] = job["evidence"], job["sources"]
+                elif job["status"] == "failed":
+                    row = pending.pop(job["job_id"])
+                    row["evidence"] = f"Evidence lookup failed: {job['error']}"
+
+        finished = total - len(pending)
+        progress.progress(finished / total, text=f"Evidence gathered for {finished} of {total} medical posts")
+        if pending:
+            time.sleep(BULK_POLL_INTERVAL)
+
+    return len(pending)
+
+
+def load_upload(uploaded_file) -> pd.DataFrame:
+    """Read an uploaded CSV or JSONL file into a DataFrame"""
+    if uploaded_file.name.endswith(".csv"):
+        return pd.read_csv(uploaded_file)
+    return pd.read_json(uploaded_file, lines=True)
+
+
+def analyze_bulk(session: requests.Session, texts: list, progress) -> pd.DataFrame:
+    """
+    Send texts in parallel chunks over the pooled session, updating `progress`
+    as chunks finish, then wait for the evidence the backend gathers for them
+    in the background.
+    """
+    chunks = [texts[i:i + BULK_CHUNK_SIZE] for i in range(0, len(texts), BULK_CHUNK_SIZE)]
+    results = [None] * len(chunks)
+    done = 0
+
+    with ThreadPoolExecutor(max_workers=BULK_PARALLEL_REQUESTS) as pool:
+        futures = {pool.submit(post_batch, session, chunk): index for index, chunk in enumerate(chunks)}
+        for future in as_completed(futures):
+            index = futures[future]
+            results[index] = future.result()
+            done += len(chunks[index])
+            progress.progress(done / len(texts), text=f"Analyzed {done} of {len(texts)} texts")
+
+    rows = [row for chunk in results for row in chunk]
+    still_pending = collect_evidence(session, rows, progress)
+    if still_pending:
+        st.warning(f"⏳ Evidence for {still_pending} posts is still being gathered; "
+                   "they are marked as pending in the results.")
+
+    return pd.DataFrame({
+        "text": texts,
+        "is_medical": [row["is_medical"] for row in rows],
+        "medical_confidence": [row["medical_confidence"] for row in rows],
+        "is_fake": [row["is_fake"] for row in rows],
+        "fake_confidence": [row["fake_confidence"] for row in rows],
+        "evidence": [row["evidence"] for row in rows],
+        "sources": [", ".join(row["sources"]) for row in rows]
+    })
+
+
+def render_bulk_upload():
+    st.header("📂 Bulk Upload")
+
+    uploaded_file = st.file_uploader("Upload a CSV or JSONL file of posts", type=["csv", "jsonl"])
+    if uploaded_file is None:
+        return
+
+    try:
+        frame = load_upload(uploaded_file)
+    except Exception as e:
+        st.error(f"Could not read file: {str(e)}")
+        return
+    if frame.empty:
+        st.warning("The file has no rows.")
+        return
+
+    columns = list(frame.columns)
+    text_column = st.selectbox("Text column", columns, index=columns.index("text") if "text" in columns else 0)
+    texts = frame[text_column].fillna("").astype(str).tolist()
+    st.caption(f"{len(texts)} rows, sent in chunks of {BULK_CHUNK_SIZE}")
+
+    if st.button("🚀 Analyze File", type="primary"):
+        progress = st.progress(0.0, text="Starting...")
+        start = time.time()
+        try:
+            # Resolved here: cache_resource needs the script thread, the upload threads have none
+            st.session_state["bulk_results"] = analyze_bulk(get_session(), texts, progress)
+        except requests.exceptions.ConnectionError:
+            st.error("❌ Cannot connect to API. Make sure the backend is running on port 8000.")
+            return
+        except Exception as e:
+            st.error(f"Error: {str(e)}")
+            return
+        st.success(f"Analyzed {len(texts)} texts in {time.time() - start:.1f}s")
+
+    results = st.session_state.get("bulk_results")
+    if results is not None:
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Rows", len(results))
+        col2.metric("Medical", int(results["is_medical"].sum()))
+        col3.metric("Likely Fake", int(results["is_fake"].sum()))
+
+        # Click a column header to sort
+        st.dataframe(results, use_container_width=True, hide_index=True)
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button("⬇️ Download CSV", results.to_csv(index=False),
+                               file_name="analysis_results.csv", mime="text/csv")
+        with col2:
+            st.download_button("⬇️ Download JSONL", results.to_json(orient="records", lines=True),
+                               file_name="analysis_results.jsonl", mime="application/x-ndjson")
+
+
 def get_confidence_class(confidence: float) -> str:
     """Get CSS class for confidence level"""
     if confidence >= 0.8:
@@ -98,12 +347,12 @@ def main():
     with st.sidebar:
         st.header("📊 Statistics")
 
-        stats = call_api("stats")
-        if stats:
-            st.metric("Total Analyses", stats['total_analyses'])
-            st.metric("Medical Posts", f"{stats['medical_posts']} ({stats['medical_percentage']}%)")
-            st.metric("Fake Posts", f"{stats['fake_posts']} ({stats['fake_percentage']}%)")
-            st.metric("Recent (24h)", stats['recent_analyses'])
+        render_stats()
+
+    mode = st.radio("Mode", ["Single text", "Bulk upload"], horizontal=True)
+    if mode == "Bulk upload":
+        render_bulk_upload()
+        return
 
     # Main interface
     st.header("🔍 Analyze Text")